@@ -20,7 +20,7 @@ from app.models.user import User
 from app.services import TelegramService
 from app.utils.jwt import decode_access_token
 from app.services.auth_service import AuthService
-from app.utils.telethon_client import TelethonManager
+from app.utils.telethon_client import TelethonManager, telethon_manager
 
 
 class CustomHTTPBearer(HTTPBearer):
@@ -122,18 +122,13 @@ async def get_account(
 
 def get_telethon_manager(request: Request) -> TelethonManager:
     """
-    Dependency: возвращает TelethonManager из app.state, создаёт один экземпляр при первом вызове.
+    Dependency: возвращает TelethonManager из app.state (по умолчанию — общий экземпляр модуля).
     """
-    tm = getattr(request.app.state, "telethon_manager", None)
-    if tm is None:
-        tm = TelethonManager()
-        request.app.state.telethon_manager = tm
-    return tm
+    return getattr(request.app.state, "telethon_manager", telethon_manager)
 
 def get_telegram_service(db: AsyncSession = Depends(get_db)) -> TelegramService:
     """Dependency для получения TelegramService"""
-    tm = TelethonManager()
-    return TelegramService(tm)
+    return TelegramService(telethon_manager)
 
 # Типизированная зависимость для удобства
 CurrentUser = Annotated[User, Depends(get_current_user)]
\ No newline at end of file
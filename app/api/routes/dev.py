@@ -10,6 +10,8 @@ from sqlalchemy import select, delete
 from app.database import get_db
 from app.models.user import User
 from app.config import settings
+from app.api.dependencies import get_telethon_manager
+from app.utils.telethon_client import TelethonManager
 
 router = APIRouter(tags=["Development"])
 
@@ -123,4 +125,29 @@ async def list_all_users(
             }
             for user in users
         ]
-    }
\ No newline at end of file
+    }
+
+
+@router.get(
+    "/telethon/lock-stats",
+    summary="Ожидание lock'ов аккаунтов",
+    description="Аккаунты с наибольшим временем ожидания lock в TelethonManager. Собирается только при DEBUG=true."
+)
+async def telethon_lock_stats(
+    tm: Annotated[TelethonManager, Depends(get_telethon_manager)],
+    top: int = 20
+):
+    """
+    Возвращает статистику ожидания per-account lock'ов.
+    Работает только в development окружении.
+    """
+    if settings.environment != "development":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This endpoint is only available in development environment"
+        )
+
+    return {
+        "enabled": settings.debug,
+        "accounts": tm.lock_stats(top)
+    }
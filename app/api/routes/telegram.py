@@ -3,8 +3,9 @@ API роутер для управления сессией telethon.
 """
 from typing import Any, Dict, List, Optional
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import (
@@ -34,6 +35,11 @@ from app.schemas.telegram import (
 router = APIRouter()
 
 
+def _dumps(payload: Any) -> bytes:
+    """JSON в байтах; datetime сериализуется в ISO 8601."""
+    return orjson.dumps(payload, option=orjson.OPT_NAIVE_UTC)
+
+
 @router.post("/accounts/{account_id}/connect")
 async def connect_account(
         account_id: int,
@@ -243,13 +249,13 @@ async def get_account_photo(
     - Пользователь должен быть владельцем аккаунта
 
     **Возвращает:**
-    - Бинарные данные изображения в формате JPEG
+    - Бинарные данные изображения в формате JPEG (потоком, по мере скачивания)
     - Cache-Control заголовок для кеширования
     """
-    photo_bytes = await service.get_photo(db, current_user.id, account_id, size)
+    photo_chunks = await service.get_photo(db, current_user.id, account_id, size)
 
-    return Response(
-        content=photo_bytes,
+    return StreamingResponse(
+        photo_chunks,
         media_type="image/jpeg",
         headers={
             "Cache-Control": "public, max-age=3600",
@@ -272,7 +278,7 @@ async def get_account_dialogs(
         current_user: User = Depends(get_current_user),
         db: AsyncSession = Depends(get_db),
         service: TelegramService = Depends(get_telegram_service)
-) -> DialogsResponse:
+) -> Response:
     """
     Получить список диалогов с полной информацией.
 
@@ -291,6 +297,9 @@ async def get_account_dialogs(
     **Возвращает:**
     - Список диалогов с детальной информацией о каждом
     - Информацию о пагинации (total, hasMore)
+
+    Ответ сериализуется напрямую (orjson), без повторной валидации через
+    DialogsResponse — схема остаётся в response_model для документации.
     """
     dialogs_data = await service.get_dialogs_extended(
         db=db,
@@ -300,7 +309,7 @@ async def get_account_dialogs(
         offset=offset,
         archived=archived
     )
-    return DialogsResponse(**dialogs_data)
+    return Response(content=_dumps(dialogs_data), media_type="application/json")
 
 
 @router.get(
@@ -327,4 +336,53 @@ async def get_account_folders(
     - Настройки каждой папки (фильтры, закрепленные чаты и т.д.)
     """
     folders_data = await service.get_folders(db, current_user.id, account_id)
-    return [FolderSchema(**folder) for folder in folders_data]
\ No newline at end of file
+    return [FolderSchema(**folder) for folder in folders_data]
+
+
+@router.get(
+    "/accounts/{account_id}/dialogs-with-folders",
+    summary="Получить диалоги и папки",
+    description="Расширенный список диалогов и папки одним запросом (загружаются параллельно)"
+)
+async def get_account_dialogs_with_folders(
+        account_id: int,
+        limit: int = Query(default=100, ge=1, le=500, description="Количество диалогов"),
+        current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db),
+        service: TelegramService = Depends(get_telegram_service)
+) -> Response:
+    """
+    Получить диалоги и папки для боковой панели за один запрос.
+
+    **Возвращает:**
+    - `dialogs`: то же, что /accounts/{account_id}/dialogs
+    - `folders`: то же, что /accounts/{account_id}/folders
+    """
+    data = await service.get_dialogs_and_folders(db, current_user.id, account_id, limit=limit)
+    return Response(content=_dumps(data), media_type="application/json")
+
+
+@router.get(
+    "/accounts/{account_id}/bootstrap",
+    summary="Получить профиль, диалоги и папки",
+    description="Данные для первого экрана одним запросом (загружаются параллельно)"
+)
+async def get_account_bootstrap(
+        account_id: int,
+        limit: int = Query(default=100, ge=1, le=500, description="Количество диалогов"),
+        current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db),
+        service: TelegramService = Depends(get_telegram_service)
+) -> Response:
+    """
+    Получить всё, что нужно клиенту при открытии аккаунта, за один запрос.
+
+    **Возвращает:**
+    - `me`: то же, что /accounts/{account_id}/me
+    - `dialogs`: то же, что /accounts/{account_id}/dialogs
+    - `folders`: то же, что /accounts/{account_id}/folders
+    """
+    data = await service.bootstrap(db, current_user.id, account_id, limit=limit)
+    # Профиль проходит через ту же схему, что и /me (имена полей, типы)
+    data["me"] = AccountMeResponse(**data["me"]).model_dump(mode="json")
+    return Response(content=_dumps(data), media_type="application/json")
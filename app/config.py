@@ -40,6 +40,45 @@ class Settings(BaseSettings):
     # Telegram API
     telegram_api_id: Optional[int] = Field(default=None, description="Telegram API ID")
     telegram_api_hash: Optional[str] = Field(default=None, description="Telegram API Hash")
+    telegram_client_idle_ttl: int = Field(
+        default=0,
+        description="Через сколько секунд простоя отключать Telethon клиент (0 — не отключать)"
+    )
+    telegram_rpc_timeout: float = Field(
+        default=30.0,
+        description="Таймаут ожидания ответа Telegram на запрос в секундах"
+    )
+    telegram_dialog_cache_ttl: float = Field(
+        default=2.0,
+        description="Время жизни кеша списка диалогов в секундах (0 — без кеша)"
+    )
+    telegram_profile_cache_ttl: float = Field(
+        default=10.0,
+        description="Время жизни кеша get_me и списка папок в секундах (0 — без кеша)"
+    )
+    telegram_rps_limit: float = Field(
+        default=0.0,
+        description=(
+            "Максимум запросов к Telegram в секунду на процесс, общий для всех аккаунтов "
+            "(0 — без ограничения; лимиты Telegram действуют на аккаунт)"
+        )
+    )
+    telegram_account_concurrency: int = Field(
+        default=4,
+        description="Максимум одновременных запросов к Telegram от одного аккаунта (0 — без ограничения)"
+    )
+    telegram_account_min_interval: float = Field(
+        default=0.0,
+        description="Минимальный интервал между запросами одного аккаунта в секундах (0 — без ограничения)"
+    )
+    telegram_idle_reaper: bool = Field(
+        default=False,
+        description="Фоновая проверка простаивающих клиентов раз в минуту (иначе — только при обращениях)"
+    )
+    telegram_flood_retry_threshold: int = Field(
+        default=5,
+        description="FloodWait не длиннее этого числа секунд пережидается и запрос повторяется один раз"
+    )
 
     # Пути
     sessions_dir: str = Field(default="./sessions", description="Директория для сессий Telegram")
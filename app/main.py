@@ -17,8 +17,8 @@ import colorlog
 from app.config import settings
 from app.database import engine, Base, init_db
 
-# Добавляем импорт TelethonManager
-from app.utils.telethon_client import TelethonManager
+from app.utils.telethon_client import telethon_manager
+from app.utils import cpu_pool
 
 # Импорт роутеров
 from app.api.routes import auth, accounts, dev, telegram
@@ -115,8 +115,13 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Failed to initialize database: {e}")
         raise
 
-    # Создаём единый TelethonManager и сохраняем в state (для зависимостей)
-    app.state.telethon_manager = TelethonManager()
+    # Пул процессов для bcrypt
+    cpu_pool.start()
+
+    # Единый TelethonManager сохраняем в state (для зависимостей)
+    app.state.telethon_manager = telethon_manager
+    if settings.telegram_idle_reaper:
+        app.state.telethon_manager.start_idle_reaper()
     logger.info("✅ TelethonManager initialized and stored in app.state")
     logger.info("=" * 60)
 
@@ -134,6 +139,9 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"⚠️ TelethonManager disconnect_all raised an error: {e}")
 
+    # Останавливаем пул процессов для bcrypt
+    cpu_pool.shutdown()
+
     await engine.dispose()
     logger.info("✅ Database connections closed")
     logger.info("=" * 60)
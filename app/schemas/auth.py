@@ -2,6 +2,8 @@
 Pydantic схемы для аутентификации.
 Валидация данных для регистрации, логина и токенов.
 """
+from typing import NamedTuple
+
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 
@@ -209,16 +211,19 @@ class Token(BaseModel):
     )
 
 
-class TokenData(BaseModel):
+class TokenData(NamedTuple):
     """
-    Схема данных из JWT токена.
+    Данные из JWT токена.
+
+    Создается на каждый аутентифицированный запрос, поэтому это легковесный
+    NamedTuple без валидации: значения уже проверены в decode_access_token.
 
     Attributes:
         user_id: ID пользователя
         username: Имя пользователя
     """
 
-    user_id: int | None = None
+    user_id: int
     username: str | None = None
 
 
@@ -11,7 +11,7 @@ from app.schemas.auth import (
     UserRegister, UserLogin, AuthResponse, UserData
 )
 from app.utils.jwt import create_access_token
-from app.utils.security import hash_password, verify_password
+from app.utils.security import hash_password_async, verify_password_async
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +43,7 @@ class AuthService:
         login = user_data.login.lower().strip()
         is_email = AuthService._is_email(login)
 
-        logger.info(f"Attempting to register user with login: {login} (is_email: {is_email})")
+        logger.info("Attempting to register user with login: %s (is_email: %s)", login, is_email)
 
         # Проверка существования пользователя
         if is_email:
@@ -55,7 +55,7 @@ class AuthService:
         existing_user = result.scalar_one_or_none()
 
         if existing_user:
-            logger.warning(f"User with login {login} already exists")
+            logger.warning("User with login %s already exists", login)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
@@ -65,8 +65,8 @@ class AuthService:
             )
 
         # Хеширование пароля
-        hashed_password = hash_password(user_data.password)
-        logger.debug(f"Password hashed successfully")
+        hashed_password = await hash_password_async(user_data.password)
+        logger.debug("Password hashed successfully")
 
         # Создание пользователя
         if is_email:
@@ -86,10 +86,10 @@ class AuthService:
             db.add(new_user)
             await db.commit()
             await db.refresh(new_user)
-            logger.info(f"User registered successfully: {new_user.id}")
+            logger.info("User registered successfully: %s", new_user.id)
         except IntegrityError as e:
             await db.rollback()
-            logger.error(f"IntegrityError during registration: {str(e)}")
+            logger.error("IntegrityError during registration: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
@@ -126,7 +126,7 @@ class AuthService:
         """
         login = credentials.login.lower().strip()
 
-        logger.info(f"Attempting to authenticate user: {login}")
+        logger.info("Attempting to authenticate user: %s", login)
 
         # Поиск пользователя по username или email
         stmt = select(User).where(
@@ -139,7 +139,7 @@ class AuthService:
         user = result.scalar_one_or_none()
 
         if not user:
-            logger.warning(f"User not found: {login}")
+            logger.warning("User not found: %s", login)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail={
@@ -149,13 +149,13 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        logger.debug(f"User found: {user.id}, verifying password...")
+        logger.debug("User found: %s, verifying password...", user.id)
 
         # Проверка пароля
-        password_valid = verify_password(credentials.password, user.hashed_password)
+        password_valid = await verify_password_async(credentials.password, user.hashed_password)
 
         if not password_valid:
-            logger.warning(f"Invalid password for user: {login}")
+            logger.warning("Invalid password for user: %s", login)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail={
@@ -165,7 +165,7 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        logger.info(f"User authenticated successfully: {user.id}")
+        logger.info("User authenticated successfully: %s", user.id)
 
         # Создание токена
         access_token = create_access_token(
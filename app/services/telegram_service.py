@@ -1,6 +1,6 @@
 # File: app/services/telegram_service.py
 
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 import logging
 from datetime import datetime, timezone
 
@@ -314,7 +314,7 @@ class TelegramService:
             # Если клиент не найден в памяти, попытаться восстановить из session_string
             if account.session_string:
                 try:
-                    logger.info(f"Клиент для аккаунта {account.id} не найден, восстанавливаем из session_string")
+                    logger.info("Клиент для аккаунта %s не найден, восстанавливаем из session_string", account.id)
                     await self.tm.create_client(
                         account.id,
                         account.api_id,
@@ -328,7 +328,7 @@ class TelegramService:
                     await self.tm.disconnect(account.id)
                 except (InvalidApiCredentials, TelethonManagerError) as e:
                     # Не удалось восстановить клиент - просто помечаем как не подключенный
-                    logger.warning(f"Не удалось восстановить клиент для аккаунта {account.id}: {e}")
+                    logger.warning("Не удалось восстановить клиент для аккаунта %s: %s", account.id, e)
                     account.is_connected = False
                     account.last_activity = datetime.now(timezone.utc)
                     db.add(account)
@@ -337,7 +337,7 @@ class TelegramService:
                     return {"status": "disconnected", "message": "Аккаунт отключен (клиент был недоступен)"}
             else:
                 # Нет session_string - просто помечаем как не подключенный
-                logger.info(f"Клиент для аккаунта {account.id} не найден и нет session_string")
+                logger.info("Клиент для аккаунта %s не найден и нет session_string", account.id)
                 account.is_connected = False
                 account.last_activity = datetime.now(timezone.utc)
                 db.add(account)
@@ -372,7 +372,7 @@ class TelegramService:
             # Если клиент не найден в памяти, попытаться восстановить из session_string
             if account.session_string:
                 try:
-                    logger.info(f"Клиент для аккаунта {account.id} не найден, восстанавливаем для logout")
+                    logger.info("Клиент для аккаунта %s не найден, восстанавливаем для logout", account.id)
                     await self.tm.create_client(
                         account.id,
                         account.api_id,
@@ -383,9 +383,9 @@ class TelegramService:
                     await self.tm.logout(account.id)
                 except (InvalidApiCredentials, TelethonManagerError) as e:
                     # Не удалось восстановить клиент - просто очищаем локально
-                    logger.warning(f"Не удалось выполнить logout для аккаунта {account.id}: {e}")
+                    logger.warning("Не удалось выполнить logout для аккаунта %s: %s", account.id, e)
             else:
-                logger.info(f"Клиент для аккаунта {account.id} не найден и нет session_string")
+                logger.info("Клиент для аккаунта %s не найден и нет session_string", account.id)
         except FloodWait as e:
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
@@ -465,9 +465,15 @@ class TelegramService:
                 detail={"error": "TELETHON_ERROR", "message": str(e)}
             )
 
-    async def get_photo(self, db: AsyncSession, user_id: int, account_id: int, size: str = "big") -> bytes:
+    async def get_photo(
+        self, db: AsyncSession, user_id: int, account_id: int, size: str = "big"
+    ) -> AsyncIterator[bytes]:
         """
-        Получить фото профиля текущего пользователя.
+        Получить фото профиля текущего пользователя потоком частей.
+
+        Первая часть скачивается сразу, чтобы отсутствие фото и ошибки Telegram
+        превратились в HTTP-ошибку до отправки заголовков ответа. Остальные
+        части докачиваются по мере того, как их забирает клиент.
 
         Args:
             db: Сессия базы данных
@@ -476,7 +482,7 @@ class TelegramService:
             size: Размер фото ("small" или "big")
 
         Returns:
-            bytes: Бинарные данные изображения
+            AsyncIterator[bytes]: Части бинарных данных изображения
 
         Raises:
             HTTPException: При различных ошибках (не найден аккаунт, не подключен, нет фото)
@@ -489,14 +495,15 @@ class TelegramService:
                 detail={"error": "ACCOUNT_NOT_CONNECTED", "message": "Аккаунт не подключен к Telegram"}
             )
 
+        stream = self.tm.download_profile_photo_stream(account_id, size)
         try:
-            photo_bytes = await self.tm.download_profile_photo(account_id, size)
-            if photo_bytes is None:
+            first = await anext(stream, None)
+            if first is None:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail={"error": "PHOTO_NOT_FOUND", "message": "У пользователя не установлено фото профиля"}
                 )
-            return photo_bytes
+            return self._photo_chunks(first, stream)
         except NotConnected:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -513,6 +520,18 @@ class TelegramService:
                 detail={"error": "TELETHON_ERROR", "message": str(e)}
             )
 
+    @staticmethod
+    async def _photo_chunks(first: bytes, stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        # Части берутся напрямую из download_profile_photo_stream. Ошибка после
+        # первой части уже не станет HTTP-статусом: соединение оборвётся, а finally
+        # закроет генератор (выход из borrow() и iter_download)
+        try:
+            yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
     async def get_dialogs_extended(
         self,
         db: AsyncSession,
@@ -588,4 +607,57 @@ class TelegramService:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail={"error": "TELETHON_ERROR", "message": str(e)}
-            )
\ No newline at end of file
+            )
+
+    async def get_dialogs_and_folders(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        account_id: int,
+        limit: int = 100,
+        with_me: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Получить расширенный список диалогов и папки одним запросом
+        (при with_me — ещё и профиль).
+        """
+        account = await self._get_account(db, account_id, user_id)
+
+        # Проверяем что аккаунт подключен
+        if not account.is_connected:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail={"error": "ACCOUNT_NOT_CONNECTED", "message": "Аккаунт не подключен к Telegram"}
+            )
+
+        try:
+            return await self.tm.get_dialogs_and_folders(
+                account_id, limit=min(limit, 500), with_me=with_me
+            )
+        except NotConnected:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail={"error": "ACCOUNT_NOT_CONNECTED", "message": "Аккаунт не подключен к Telegram"}
+            )
+        except FloodWait as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail={"error": "FLOOD_WAIT", "message": "Flood wait", "seconds": getattr(e, "seconds", None)}
+            )
+        except TelethonManagerError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail={"error": "TELETHON_ERROR", "message": str(e)}
+            )
+
+    async def bootstrap(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        account_id: int,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Получить профиль, расширенный список диалогов и папки одним запросом.
+        """
+        return await self.get_dialogs_and_folders(db, user_id, account_id, limit=limit, with_me=True)
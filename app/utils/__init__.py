@@ -1,11 +1,18 @@
 """Вспомогательные утилиты."""
 
-from app.utils.security import hash_password, verify_password
+from app.utils.security import (
+    hash_password,
+    verify_password,
+    hash_password_async,
+    verify_password_async,
+)
 from app.utils.jwt import create_access_token, decode_access_token
 
 __all__ = [
     "hash_password",
     "verify_password",
+    "hash_password_async",
+    "verify_password_async",
     "create_access_token",
     "decode_access_token",
 ]
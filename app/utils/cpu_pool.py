@@ -0,0 +1,66 @@
+"""
+Пул процессов для CPU-тяжёлых операций (хеширование паролей bcrypt).
+
+bcrypt намеренно медленный (~сотни миллисекунд на хеш), поэтому выполняется
+вне event loop в постоянном пуле процессов: пул создаётся в lifespan
+приложения, процессы запускаются один раз и при старте прогревают bcrypt.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _warm() -> None:
+    """Инициализатор процесса пула: прогрев bcrypt."""
+    import bcrypt
+
+    # Первый хеш загружает модуль и прогревает P/S-блоки Blowfish в кеше ядра
+    bcrypt.hashpw(b"warmup", bcrypt.gensalt(rounds=4))
+
+
+def start() -> None:
+    """
+    Создаёт пул процессов. Вызывается из lifespan приложения.
+
+    Процессы порождаются через forkserver (или spawn, где его нет), а не fork:
+    форк работающего процесса копирует состояние event loop и потоков.
+    """
+    global _executor
+    if _executor is not None:
+        return
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    _executor = ProcessPoolExecutor(
+        mp_context=multiprocessing.get_context(method),
+        initializer=_warm,
+    )
+
+
+def shutdown() -> None:
+    """Останавливает пул процессов, отменяя задачи из очереди."""
+    global _executor
+    if _executor is None:
+        return
+    _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+
+
+async def run_cpu(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Выполняет функцию в пуле процессов, не блокируя event loop.
+
+    Если пул не запущен (вне lifespan, например в скриптах), функция
+    выполняется в стандартном пуле потоков event loop.
+
+    Args:
+        func: Функция уровня модуля (должна сериализоваться pickle)
+        *args: Аргументы функции
+
+    Returns:
+        Результат функции
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args))
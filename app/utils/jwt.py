@@ -1,6 +1,7 @@
 """Утилиты для работы с JWT токенами."""
 
-from datetime import datetime, timedelta, timezone
+import time
+from datetime import timedelta
 from typing import Optional
 
 from jose import JWTError, jwt
@@ -8,6 +9,12 @@ from jose import JWTError, jwt
 from app.config import settings
 from app.schemas.auth import TokenData
 
+# Время жизни токена по умолчанию в секундах (вычисляется один раз при импорте)
+_default_exp_sec = settings.access_token_expire_minutes * 60
+
+# Максимальная длина JWT, которую имеет смысл декодировать
+_MAX_TOKEN_LENGTH = 4096
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -22,12 +29,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     """
     to_encode = data.copy()
 
+    # exp в JWT — unix timestamp, поэтому считаем его сразу в секундах без datetime
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = int(time.time()) + int(expires_delta.total_seconds())
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
+        expire = int(time.time()) + _default_exp_sec
 
-    to_encode.update({"exp": expire})
+    to_encode["exp"] = expire
     encoded_jwt = jwt.encode(
         to_encode,
         settings.secret_key,  # Используем secret_key вместо JWT_SECRET
@@ -47,6 +55,10 @@ def decode_access_token(token: str) -> Optional[TokenData]:
     Returns:
         TokenData с user_id и username или None если токен невалиден
     """
+    # Явно битые токены отсекаем до разбора JSON и проверки подписи
+    if not token or len(token) > _MAX_TOKEN_LENGTH or token.count(".") != 2 or not token.isascii():
+        return None
+
     try:
         payload = jwt.decode(
             token,
@@ -59,7 +71,7 @@ def decode_access_token(token: str) -> Optional[TokenData]:
         if user_id is None:
             return None
 
-        return TokenData(user_id=int(user_id), username=username)
+        return TokenData(int(user_id), username)
 
     except JWTError:
         return None
@@ -0,0 +1,33 @@
+"""
+Token bucket для сглаживания исходящих запросов к Telegram.
+
+Запросы сверх лимита не отклоняются, а ждут своей очереди: ожидание
+дешевле, чем FloodWait от сервера.
+"""
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Ограничитель rate запросов в секунду с запасом capacity на всплески.
+
+    Работает в одном event loop без блокировок: каждый вызов acquire()
+    сразу резервирует токен (баланс может уйти в минус) и спит, пока
+    этот долг не будет погашен пополнением.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        """Ждёт, пока для запроса появится токен."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
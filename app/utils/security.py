@@ -2,6 +2,8 @@
 
 from passlib.context import CryptContext
 
+from app.utils.cpu_pool import run_cpu
+
 # Контекст для хеширования паролей с использованием bcrypt
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -30,4 +32,31 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True если пароль совпадает, иначе False
     """
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Хеширует пароль в пуле процессов, не блокируя event loop.
+
+    Args:
+        password: Открытый пароль
+
+    Returns:
+        Хешированный пароль
+    """
+    return await run_cpu(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Проверяет пароль в пуле процессов, не блокируя event loop.
+
+    Args:
+        plain_password: Открытый пароль
+        hashed_password: Хешированный пароль
+
+    Returns:
+        True если пароль совпадает, иначе False
+    """
+    return await run_cpu(verify_password, plain_password, hashed_password)
@@ -1,6 +1,14 @@
 import asyncio
+import itertools
 import logging
-from typing import Optional, Dict, Any, List
+import random
+import struct
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Optional, Dict, Any, List, Set, Tuple, AsyncIterator
 from datetime import datetime
 
 from telethon import TelegramClient
@@ -9,7 +17,10 @@ from telethon.errors import (
     PhoneCodeInvalidError,
     PhoneCodeExpiredError,
     ApiIdInvalidError,
-    PasswordHashInvalidError
+    PasswordHashInvalidError,
+    PhoneNumberInvalidError,
+    AuthKeyUnregisteredError,
+    FloodWaitError,
 )
 from telethon.sessions import StringSession
 from telethon import errors
@@ -18,12 +29,42 @@ from telethon.tl.types import (
     UserStatusOnline, UserStatusOffline, UserStatusRecently,
     UserStatusLastWeek, UserStatusLastMonth, UserStatusEmpty,
     UserProfilePhoto, ChatPhoto, MessageMediaPhoto,
-    Dialog, DialogFilter, InputPeerEmpty, PeerUser, PeerChat, PeerChannel
+    Dialog, DialogFilter, InputPeerEmpty, PeerUser, PeerChat, PeerChannel,
+    InputPeerUser, InputPeerChat, InputPeerChannel, UserEmpty, ChatEmpty,
+    InputPeerSelf, InputPeerPhotoFileLocation
 )
-from telethon.tl.functions.messages import GetDialogFiltersRequest
+from telethon.tl.types.messages import DialogsSlice
+from telethon.tl.functions.messages import GetDialogFiltersRequest, GetDialogsRequest
+from telethon.utils import get_peer_id, get_display_name, get_input_peer
+
+from app.config import settings
+from app.utils.rate_limit import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+# Максимум одновременно подключённых клиентов; сверх лимита давно не
+# использовавшиеся клиенты отключаются так же, как по простою
+_MAX_CLIENTS = 10_000
+
+# Сколько освобождённых asyncio.Lock держать для повторного использования
+_LOCK_POOL_SIZE = 256
+
+# Период фоновой проверки простаивающих клиентов, секунды
+_REAPER_INTERVAL = 60
+
+# Сколько клиентов disconnect_all закрывает одновременно
+_DISCONNECT_CONCURRENCY = 64
+# Сколько секунд ждать отключения одного клиента при остановке
+_DISCONNECT_TIMEOUT = 5.0
+
+# Временные сбои сети/серверов Telegram, после которых запрос имеет смысл повторить.
+# FloodWait, неверный код и неверный api_id сюда не входят — повтор их не исправит.
+# Таймаут тоже не повторяется: каждая попытка уже ждёт до telegram_rpc_timeout.
+_TRANSIENT_ERRORS = (
+    errors.ServerError,  # 5xx, в том числе RpcCallFailError
+    ConnectionError,
+)
+
 
 # Exceptions для маппинга в сервис/роутеры
 class TelethonManagerError(Exception):
@@ -81,34 +122,603 @@ class ExpiredCodeError(TelethonManagerError):
     pass
 
 
-class TelethonManager:
-    """Менеджер для управления Telethon клиентами (Singleton)"""
+# Ошибки Telegram, у которых есть собственное исключение менеджера (поиск по точному типу)
+_ERROR_MAP: Dict[type, type] = {
+    ApiIdInvalidError: InvalidApiCredentials,
+    PhoneNumberInvalidError: PhoneNumberInvalid,
+    PhoneCodeInvalidError: InvalidCode,
+    PhoneCodeExpiredError: ExpiredCodeError,
+    SessionPasswordNeededError: PasswordRequired,
+    PasswordHashInvalidError: InvalidPasswordError,
+    AuthKeyUnregisteredError: NotConnected,
+}
+
+
+def _translate_error(e: Exception) -> TelethonManagerError:
+    """Преобразует ошибку Telethon/сети в исключение TelethonManager."""
+    if isinstance(e, FloodWaitError):
+        return FloodWait(int(getattr(e, "seconds", 0)))
+    mapped = _ERROR_MAP.get(type(e))
+    if mapped is not None:
+        return mapped(str(e))
+    return TelethonManagerError(str(e))
+
+
+# Статусы без даты: один и тот же dict на все диалоги (только сериализуется, не изменять)
+_STATIC_STATUS: Dict[type, Dict[str, Any]] = {
+    UserStatusOnline: {"type": "online", "wasOnline": None},
+    UserStatusRecently: {"type": "recently", "wasOnline": None},
+    UserStatusLastWeek: {"type": "lastWeek", "wasOnline": None},
+    UserStatusLastMonth: {"type": "lastMonth", "wasOnline": None},
+    UserStatusEmpty: {"type": "offline", "wasOnline": None},
+}
+_OFFLINE_STATUS = _STATIC_STATUS[UserStatusEmpty]
+
+
+# Разбор entity диалога по типу. Поля TL-объектов есть всегда (флаги — None/bool),
+# поэтому читаются напрямую; getattr оставлен для полей новых слоёв схемы.
+def _parse_user_entity(entity: User, parse_photo, parse_status) -> Dict[str, Any]:
+    return {
+        "id": entity.id,
+        "firstName": entity.first_name or "",
+        "lastName": entity.last_name or "",
+        "username": entity.username,
+        "phone": entity.phone,
+        "isBot": entity.bot,
+        "isVerified": entity.verified,
+        "isPremium": getattr(entity, "premium", False),
+        "isContact": entity.contact,
+        "isMutualContact": entity.mutual_contact,
+        "photo": parse_photo(entity.photo),
+        "status": parse_status(entity.status)
+    }
+
+
+def _parse_chat_entity(entity: Chat, parse_photo, parse_status) -> Dict[str, Any]:
+    # Обычная группа
+    return {
+        "id": entity.id,
+        "title": entity.title,
+        "participantsCount": entity.participants_count,
+        "createdDate": entity.date,
+        "isCreator": entity.creator,
+        "isAdmin": entity.admin_rights is not None,
+        "photo": parse_photo(entity.photo)
+    }
+
+
+def _parse_channel_entity(entity: Channel, parse_photo, parse_status) -> Dict[str, Any]:
+    # Канал или мегагруппа
+    return {
+        "id": entity.id,
+        "title": entity.title,
+        "username": entity.username,
+        "participantsCount": entity.participants_count,
+        "createdDate": entity.date,
+        "isCreator": entity.creator,
+        "isAdmin": entity.admin_rights is not None,
+        "isBroadcast": entity.broadcast,  # True = канал, False = мегагруппа
+        "isVerified": entity.verified,
+        "isScam": entity.scam,
+        "isFake": entity.fake,
+        "hasGeo": entity.has_geo,
+        "slowmodeEnabled": entity.slowmode_enabled,
+        "photo": parse_photo(entity.photo)
+    }
+
+
+# Флаги User для get_me: (ключ ответа, атрибут, значение по умолчанию)
+_ME_FLAG_FIELDS: Tuple[Tuple[str, str, Any], ...] = (
+    ("isContact", "contact", False),
+    ("isMutualContact", "mutual_contact", False),
+    ("isDeleted", "deleted", False),
+    ("isBot", "bot", False),
+    ("isBotChatHistory", "bot_chat_history", False),
+    ("isBotNochats", "bot_nochats", False),
+    ("isVerified", "verified", False),
+    ("isRestricted", "restricted", False),
+    ("isMin", "min", False),
+    ("isBotInlineGeo", "bot_inline_geo", False),
+    ("isSupport", "support", False),
+    ("isScam", "scam", False),
+    ("isFake", "fake", False),
+    ("isPremium", "premium", False),
+    ("isBotAttachMenu", "bot_attach_menu", False),
+    ("isBotAttachMenuEnabled", "attach_menu_enabled", False),
+    ("isBotCanEdit", "bot_can_edit", False),
+    ("isCloseFriend", "close_friend", False),
+    ("isStoriesHidden", "stories_hidden", False),
+    ("isStoriesUnavailable", "stories_unavailable", False),
+    ("isContactRequirePremium", "contact_require_premium", False),
+    ("isBotBusiness", "bot_business", False),
+    ("isBotHasMainApp", "bot_has_main_app", False),
+    ("isApplyMinPhoto", "apply_min_photo", False),
+)
+
+
+_ENTITY_PARSERS = {
+    User: _parse_user_entity,
+    Chat: _parse_chat_entity,
+    Channel: _parse_channel_entity,
+}
+# ID entity диалога по точному типу; для остальных типов ID не отдаётся
+_ID_EXTRACTORS = dict.fromkeys((User, Chat, Channel), attrgetter("id"))
+
+# Тип entity для ответа: (флаг, тип при флаге, тип без флага).
+# У Channel broadcast=True — канал (односторонняя рассылка), иначе супергруппа
+_ENTITY_TYPE_NAMES: Dict[type, Tuple[Optional[str], str, str]] = {
+    User: ("bot", "bot", "user"),
+    Chat: (None, "group", "group"),
+    Channel: ("broadcast", "channel", "supergroup"),
+}
+
+# Поле с ID отправителя последнего сообщения (Message.from_id)
+_FROM_ID_ATTR: Dict[type, str] = {
+    PeerUser: "user_id",
+    PeerChannel: "channel_id",
+    PeerChat: "chat_id",
+}
+
+# Смещение «с начала списка» для GetDialogsRequest; TL-объект не изменяется
+_EMPTY_PEER = InputPeerEmpty()
+# Больше диалогов за один GetDialogsRequest Telegram не отдаёт
+_DIALOGS_CHUNK = 100
+# Верхняя граница limit для упрощённого списка диалогов (как в роутах)
+_DIALOGS_MAX = 500
+
+# Сколько разобранных фото профиля держать в LRU-кеше
+_PHOTO_CACHE_SIZE = 4096
+# Размер части при потоковой загрузке фото профиля (кратен 4 КБ, делит 1 МБ)
+_PHOTO_CHUNK_SIZE = 64 * 1024
+
+
+# Списки пиров и флаги DialogFilter — обязательные поля схемы, читаются одним вызовом
+_FILTER_PEERS = attrgetter("pinned_peers", "include_peers", "exclude_peers")
+_FILTER_FLAGS = attrgetter(
+    "contacts", "non_contacts", "groups", "broadcasts", "bots",
+    "exclude_muted", "exclude_read", "exclude_archived",
+)
+
+# Папка "Все чаты" в начале списка get_folders: один dict на все ответы
+# (только сериализуется, не изменять; пустые списки — кортежи)
+_DEFAULT_FOLDER: Dict[str, Any] = {
+    "id": 0,
+    "title": "Все чаты",
+    "isDefault": True,
+    "emoji": None,
+    "pinnedDialogIds": (),
+    "includedChatIds": (),
+    "excludedChatIds": (),
+    "contacts": False,
+    "nonContacts": False,
+    "groups": False,
+    "broadcasts": False,
+    "bots": False,
+    "excludeMuted": False,
+    "excludeRead": False,
+    "excludeArchived": False,
+}
+
+# Поле с ID для пиров папок (include/exclude/pinned)
+_PEER_ID_ATTR: Dict[type, str] = {
+    InputPeerUser: "user_id",
+    InputPeerChannel: "channel_id",
+    InputPeerChat: "chat_id",
+}
+
+
+def _peer_id(peer) -> str:
+    attr = _PEER_ID_ATTR.get(type(peer))
+    if attr is None:
+        # Редкие типы (например, InputPeerUserFromMessage) — определяем по атрибутам
+        attr = "user_id" if hasattr(peer, "user_id") else "channel_id" if hasattr(peer, "channel_id") else "chat_id"
+    return str(getattr(peer, attr))
+
+
+@dataclass(slots=True, frozen=True)
+class DialogRow:
+    """Строка упрощённого списка диалогов (сериализуется FastAPI как объект)."""
+    id: Optional[int]
+    title: Optional[str]
+    username: Optional[str]
+    unread_count: int
+
+
+# Построение DialogRow по типу entity: поля читаются напрямую, без getattr.
+# Имя пользователя собирается так же, как в telethon.utils.get_display_name
+def _user_row(ent: User, unread_count: int) -> DialogRow:
+    first, last = ent.first_name, ent.last_name
+    title = f"{first} {last}" if first and last else first or last or None
+    return DialogRow(ent.id, title, ent.username, unread_count)
+
+
+def _chat_row(ent: Chat, unread_count: int) -> DialogRow:
+    return DialogRow(ent.id, ent.title or None, None, unread_count)
+
+
+def _channel_row(ent: Channel, unread_count: int) -> DialogRow:
+    return DialogRow(ent.id, ent.title or None, ent.username, unread_count)
+
 
-    _instance: Optional['TelethonManager'] = None
-    _lock: asyncio.Lock = asyncio.Lock()
+def _generic_row(ent, unread_count: int) -> DialogRow:
+    # ChatForbidden/ChannelForbidden: без ID, как и в get_dialogs_extended
+    return DialogRow(None, get_display_name(ent) or None, getattr(ent, "username", None), unread_count)
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
+
+_ROW_BUILDERS = {
+    User: _user_row,
+    Chat: _chat_row,
+    Channel: _channel_row,
+}
+
+
+class TelethonManager:
+    """
+    Менеджер для управления Telethon клиентами.
+
+    Приложение использует единственный экземпляр telethon_manager из этого модуля.
+    """
 
     def __init__(self):
-        if self._initialized:
-            return
+        # Инвариант: _clients изменяется только под lock'ом аккаунта (create_client,
+        # disconnect, logout, вытеснение по простою, disconnect_all). Чтения берут
+        # клиент без lock'а через borrow()/_get_client: dict.get атомарен между await,
+        # а запросы одного клиента Telethon мультиплексирует сам. Отключение во время
+        # чтения borrow() распознаёт по смене объекта в _clients.
         self._clients: Dict[int, TelegramClient] = {}
-        self._locks: Dict[int, asyncio.Lock] = {}
+        # Lock создаётся при первом обращении к аккаунту одной операцией словаря;
+        # освобождённые lock'и возвращаются в пул и выдаются повторно
+        self._lock_pool: List[asyncio.Lock] = []
+        self._locks: defaultdict[int, asyncio.Lock] = defaultdict(self._new_lock)
+        # В режиме отладки: account_id -> [суммарное ожидание lock в нс, число захватов]
+        self._lock_stats: Optional[defaultdict[int, List[int]]] = (
+            defaultdict(lambda: [0, 0]) if settings.debug else None
+        )
         self._phone_code_hashes: Dict[int, str] = {}
         self._password_hints: Dict[int, Optional[str]] = {}
+        # Учёт простоя: аккаунты в порядке последнего обращения (старые — в начале)
+        self._last_used: "OrderedDict[int, float]" = OrderedDict()
+        self._idle_ttl = settings.telegram_client_idle_ttl
+        # api_id/api_hash подключённых аккаунтов и сессии отключённых по простою
+        self._credentials: Dict[int, Tuple[int, str]] = {}
+        self._evicted: Dict[int, str] = {}
+        # Разобранные StringSession по аккаунтам: (исходная строка, объект сессии)
+        self._sessions: Dict[int, Tuple[str, StringSession]] = {}
+        self._background_tasks: Set[asyncio.Task] = set()
+        self._reaper: Optional[asyncio.Task] = None
+        self._rpc_timeout = settings.telegram_rpc_timeout
+        self._flood_retry_threshold = settings.telegram_flood_retry_threshold
+        # Общий лимит исходящих запросов: ждём токен до отправки, а не FloodWait после
+        rps = settings.telegram_rps_limit
+        self._rate_limiter: Optional[TokenBucket] = TokenBucket(rps, rps) if rps > 0 else None
+        # Лимиты одного аккаунта: параллельность и минимальный интервал между запросами
+        self._account_concurrency = settings.telegram_account_concurrency
+        self._account_min_interval = settings.telegram_account_min_interval
+        self._account_slots: Dict[int, asyncio.Semaphore] = {}
+        self._account_buckets: Dict[int, TokenBucket] = {}
+        # Кеш get_dialogs: (account_id, limit) -> (время получения, результат)
+        # Одна запись на аккаунт: (время, limit загрузки, строки); меньший limit — срез
+        self._dialog_cache: Dict[int, Tuple[float, int, Tuple[DialogRow, ...]]] = {}
+        self._dialog_ttl = settings.telegram_dialog_cache_ttl
+        # Кеши профиля и get_folders: account_id -> (время получения, результат).
+        # Профиль хранится сырым User (нужен и get_me, и скачиванию фото)
+        self._me_cache: Dict[int, Tuple[float, User]] = {}
+        self._folders_cache: Dict[int, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._profile_ttl = settings.telegram_profile_cache_ttl
+        # (photo_id, dc_id, has_video) -> результат _parse_photo; отдаётся по ссылке,
+        # поэтому результат только сериализуется и не изменяется
+        self._photo_cache: "OrderedDict[Tuple[int, int, Any], Dict[str, Any]]" = OrderedDict()
+        # Аккаунты с подтверждённой авторизацией; сбрасывается при AuthKeyUnregistered
+        # (NotConnected), disconnect и logout. Отзыв сессии повторной проверкой не
+        # обнаружить: Telethon запоминает результат is_user_authorized() в клиенте,
+        # поэтому его распознаёт первый же запрос, получивший AuthKeyUnregistered
+        self._authorized: Set[int] = set()
         self._logger = logger
-        self._initialized = True
-        logger.info("TelethonManager инициализирован (Singleton)")
+        self._debug = logger.debug
+        logger.info("TelethonManager инициализирован")
+
+    def _new_lock(self) -> asyncio.Lock:
+        return self._lock_pool.pop() if self._lock_pool else asyncio.Lock()
 
     def _get_lock(self, account_id: int) -> asyncio.Lock:
-        if account_id not in self._locks:
-            self._locks[account_id] = asyncio.Lock()
         return self._locks[account_id]
 
+    def _drop_caches(self, account_id: int) -> None:
+        self._dialog_cache.pop(account_id, None)
+        self._me_cache.pop(account_id, None)
+        self._folders_cache.pop(account_id, None)
+
+    def _drop_limits(self, account_id: int) -> None:
+        self._account_slots.pop(account_id, None)
+        self._account_buckets.pop(account_id, None)
+
+    @asynccontextmanager
+    async def _account_lock(self, account_id: int):
+        """
+        Захватывает lock аккаунта и удаляет его из словаря, когда он больше
+        никому не нужен, чтобы _locks не рос с каждым когда-либо виденным аккаунтом.
+        """
+        lock = self._get_lock(account_id)
+        stats = self._lock_stats
+        started = time.perf_counter_ns() if stats is not None else 0
+        try:
+            async with lock:
+                if stats is not None:
+                    entry = stats[account_id]
+                    entry[0] += time.perf_counter_ns() - started
+                    entry[1] += 1
+                yield
+        finally:
+            # Lock без владельца и ожидающих можно удалить: следующий вызов создаст новый
+            if not lock.locked() and not getattr(lock, "_waiters", None) and self._locks.get(account_id) is lock:
+                del self._locks[account_id]
+                if len(self._lock_pool) < _LOCK_POOL_SIZE:
+                    self._lock_pool.append(lock)
+
+    def lock_stats(self, top: int = 20) -> List[Dict[str, Any]]:
+        """
+        Аккаунты с наибольшим суммарным ожиданием lock (только при settings.debug).
+        Нужны, чтобы понять, где блокировка действительно мешает, прежде чем её убирать.
+        """
+        if self._lock_stats is None:
+            return []
+        ranked = sorted(self._lock_stats.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        return [
+            {
+                "accountId": account_id,
+                "acquires": count,
+                "waitMsTotal": round(wait_ns / 1e6, 3),
+                "waitMsAvg": round(wait_ns / count / 1e6, 3) if count else 0.0,
+            }
+            for account_id, (wait_ns, count) in ranked
+        ]
+
+    def _touch(self, account_id: int) -> None:
+        """
+        Отмечает обращение к клиенту и отключает клиенты, простаивающие дольше
+        idle TTL или вытесненные лимитом _MAX_CLIENTS.
+        """
+        last_used = self._last_used
+        last_used[account_id] = time.monotonic()
+        last_used.move_to_end(account_id)
+        self._expire_idle()
+
+    def _expire_idle(self) -> None:
+        last_used = self._last_used
+        deadline = time.monotonic() - self._idle_ttl if self._idle_ttl > 0 else None
+        # Не больше одного прохода: клиенты с незавершённым входом переносятся в конец
+        for _ in range(len(last_used)):
+            account_id, ts = next(iter(last_used.items()))
+            expired = deadline is not None and ts <= deadline
+            if not expired and len(last_used) <= _MAX_CLIENTS:
+                break
+            del last_used[account_id]
+            if account_id in self._phone_code_hashes:
+                # Идёт вход по коду — такой клиент не отключаем
+                last_used[account_id] = time.monotonic()
+                continue
+            task = asyncio.create_task(self._evict(account_id))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+    def start_idle_reaper(self, interval: float = _REAPER_INTERVAL) -> None:
+        """
+        Запускает фоновую задачу, которая раз в interval секунд отключает
+        простаивающие клиенты, даже если к менеджеру никто не обращается.
+        """
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._idle_reaper(interval))
+
+    async def _idle_reaper(self, interval: float) -> None:
+        # Хранит только id аккаунтов (через _last_used), а не ссылки на клиенты
+        while True:
+            await asyncio.sleep(interval)
+            self._expire_idle()
+
+    async def _evict(self, account_id: int) -> None:
+        """
+        Отключает простаивающий клиент, сохранив сессию в памяти
+        для прозрачного переподключения при следующем обращении.
+        """
+        async with self._account_lock(account_id):
+            if account_id in self._last_used:
+                # К клиенту обратились, пока задача ждала lock
+                return
+            client = self._clients.get(account_id)
+            if not client:
+                return
+            # Сериализация сессии (base64 ключа авторизации) — вне event loop
+            session_string = await asyncio.to_thread(client.session.save)
+            if account_id in self._last_used:
+                # К клиенту обратились, пока сессия сериализовалась
+                return
+            # Клиент убираем вместе с записью в _evicted, без await между ними,
+            # чтобы _get_client всегда видел одно из двух
+            del self._clients[account_id]
+            self._evicted[account_id] = session_string
+            self._sessions[account_id] = (session_string, client.session)
+            try:
+                await client.disconnect()
+            except OSError as e:
+                self._debug("evict error: %s", type(e).__name__)
+        self._logger.info("Клиент аккаунта %s отключен по простою", account_id)
+
+    async def _get_client(self, account_id: int) -> Optional[TelegramClient]:
+        """
+        Возвращает клиент аккаунта; если он был отключен по простою —
+        переподключает его из сохранённой сессии.
+        """
+        client = self._clients.get(account_id)
+        if client is None and account_id in self._evicted:
+            api_id, api_hash = self._credentials[account_id]
+            try:
+                client = await self.create_client(account_id, api_id, api_hash, self._evicted[account_id])
+            except AlreadyConnected:
+                # Параллельный запрос уже переподключил клиент
+                client = self._clients.get(account_id)
+        if client is not None:
+            self._touch(account_id)
+        return client
+
+    async def _get_session(self, account_id: int, session_string: Optional[str]) -> StringSession:
+        """
+        Возвращает StringSession для аккаунта, переиспользуя уже разобранную сессию,
+        если строка совпадает с той, из которой она была создана.
+        Разбор новой строки (base64 + ключ авторизации) выполняется в пуле потоков.
+        """
+        if not session_string:
+            return StringSession()
+        cached = self._sessions.get(account_id)
+        if cached and cached[0] == session_string:
+            return cached[1]
+        try:
+            session = await asyncio.to_thread(StringSession, session_string)
+        except (ValueError, struct.error) as e:
+            # Повреждённая строка: неверный base64 (ValueError) или длина (struct.error)
+            raise TelethonManagerError("invalid session string") from e
+        self._sessions[account_id] = (session_string, session)
+        return session
+
+    @asynccontextmanager
+    async def _account_slot(self, account_id: Optional[int]):
+        """
+        Место для запроса аккаунта: не больше telegram_account_concurrency
+        одновременных запросов и не чаще одного в telegram_account_min_interval.
+        Без account_id ограничивается только общим лимитом.
+        """
+        if account_id is None or self._account_concurrency <= 0:
+            sem = None
+        else:
+            sem = self._account_slots.get(account_id)
+            if sem is None:
+                sem = self._account_slots[account_id] = asyncio.Semaphore(self._account_concurrency)
+        if sem is not None:
+            await sem.acquire()
+        try:
+            if account_id is not None and self._account_min_interval > 0:
+                bucket = self._account_buckets.get(account_id)
+                if bucket is None:
+                    # Ёмкость 1: запросы аккаунта идут с интервалом, без всплесков
+                    bucket = self._account_buckets[account_id] = TokenBucket(1 / self._account_min_interval, 1)
+                await bucket.acquire()
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire()
+            yield
+        finally:
+            if sem is not None:
+                sem.release()
+
+    async def _rpc(self, awaitable, *, account_id: Optional[int] = None):
+        """
+        Выполняет запрос к Telegram с ограничением времени ожидания ответа.
+        Ошибки Telegram и сети пробрасываются как исключения TelethonManager.
+        """
+        try:
+            async with self._account_slot(account_id), asyncio.timeout(self._rpc_timeout):
+                return await awaitable
+        except TimeoutError:
+            raise TelethonManagerError("rpc timeout")
+        except (errors.RPCError, OSError) as e:
+            raise _translate_error(e) from e
+
+    async def _with_retry(self, fn, *, account_id: Optional[int] = None,
+                          max_retries: int = 3, base: float = 1.0, cap: float = 30.0):
+        """
+        Выполняет запрос с повторами при временных сбоях.
+
+        Пауза между попытками — экспоненциальная с полным джиттером
+        (random(0, min(cap, base * 2**attempt))), чтобы после сбоя дата-центра
+        все аккаунты не повторяли запросы одновременно. Короткий FloodWait
+        (не длиннее порога из настроек) пережидается один раз, длинный
+        пробрасывается вызывающему.
+
+        Args:
+            fn: Функция без аргументов, возвращающая новую корутину запроса
+            account_id: Аккаунт, в лимиты которого засчитывается запрос
+        """
+        attempt = 0
+        flood_retried = False
+        while True:
+            try:
+                async with self._account_slot(account_id), asyncio.timeout(self._rpc_timeout):
+                    return await fn()
+            except FloodWaitError as e:
+                seconds = int(getattr(e, "seconds", 0))
+                if flood_retried or seconds > self._flood_retry_threshold:
+                    raise FloodWait(seconds) from e
+                flood_retried = True
+                await asyncio.sleep(seconds + random.uniform(0, 0.5 * seconds))
+            except TimeoutError:
+                raise TelethonManagerError("rpc timeout")
+            except _TRANSIENT_ERRORS as e:
+                if attempt >= max_retries:
+                    raise _translate_error(e) from e
+                delay = random.uniform(0, min(cap, base * 2 ** attempt))
+                if self._logger.isEnabledFor(logging.DEBUG):
+                    self._debug("Transient %s, retry %d in %.2fs", type(e).__name__, attempt + 1, delay)
+                attempt += 1
+                await asyncio.sleep(delay)
+            except (errors.RPCError, OSError) as e:
+                raise _translate_error(e) from e
+
+    async def _is_authorized(self, account_id: int, client: TelegramClient) -> bool:
+        """
+        Проверяет авторизацию клиента; сетевой запрос (GetState) — только пока
+        авторизация аккаунта ещё не подтверждена.
+        """
+        if account_id in self._authorized:
+            return True
+        authorized = await self._with_retry(client.is_user_authorized, account_id=account_id)
+        if authorized:
+            self._authorized.add(account_id)
+        return authorized
+
+    async def _ensure_authorized(self, account_id: int, client: TelegramClient) -> None:
+        if not await self._is_authorized(account_id, client):
+            raise NotConnected("client not authorized")
+
+    async def _get_me_cached(self, account_id: int, client: TelegramClient) -> User:
+        """Текущий пользователь аккаунта; запрос к Telegram — не чаще раза в TTL профиля."""
+        cached = self._me_cache.get(account_id)
+        if cached and time.monotonic() - cached[0] < self._profile_ttl:
+            return cached[1]
+        me = await self._rpc(client.get_me(), account_id=account_id)
+        if self._profile_ttl > 0:
+            self._me_cache[account_id] = (time.monotonic(), me)
+        return me
+
+    @asynccontextmanager
+    async def borrow(self, account_id: int, op: str = "request"):
+        """
+        Авторизованный клиент аккаунта на время запроса:
+        ``async with manager.borrow(account_id, "get_me") as client: ...``
+
+        Lock аккаунта не берётся: он защищает только жизненный цикл клиента
+        (create/disconnect/logout), чтения одного аккаунта идут параллельно.
+        Ошибка запроса к клиенту, который отключили во время ожидания,
+        пробрасывается как NotConnected.
+
+        Args:
+            account_id: ID аккаунта
+            op: Название операции для лога ошибок
+        """
+        client = await self._get_client(account_id)
+        if not client:
+            raise NotConnected("client not created")
+        try:
+            await self._ensure_authorized(account_id, client)
+            yield client
+        except NotConnected:
+            # Сессия отозвана на стороне Telegram или клиент не авторизован
+            self._authorized.discard(account_id)
+            raise
+        except TelethonManagerError as e:
+            if self._clients.get(account_id) is not client:
+                # Клиент отключили (disconnect/logout) во время запроса
+                raise NotConnected("client disconnected") from e
+            self._logger.error("%s error: %s: %s", op, type(e).__name__, e)
+            raise
+
     async def create_client(
             self,
             account_id: int,
@@ -120,25 +730,32 @@ class TelethonManager:
         Создаёт и подключает TelegramClient (если ещё не создан).
         Не логирует session_string.
         """
-        lock = self._get_lock(account_id)
-        async with lock:
+        # Быстрая проверка без lock: повторный connect для живого клиента
+        # отклоняем сразу, не вставая в очередь за lifecycle-операциями
+        existing = self._clients.get(account_id)
+        if existing and existing.is_connected():
+            raise AlreadyConnected("client already connected for account")
+
+        async with self._account_lock(account_id):
+            # Повторная проверка под lock: клиент мог быть создан, пока мы ждали
             existing = self._clients.get(account_id)
-            if existing and getattr(existing, "is_connected", lambda: False)():
+            if existing and existing.is_connected():
                 raise AlreadyConnected("client already connected for account")
 
             try:
-                session = StringSession(session_string) if session_string else StringSession()
-                client = TelegramClient(session, api_id, api_hash)
+                session = await self._get_session(account_id, session_string)
+                # Конструктор синхронный; asyncio-примитивы клиента привязываются
+                # к event loop лениво, поэтому его можно создать в другом потоке
+                client = await asyncio.to_thread(TelegramClient, session, api_id, api_hash)
                 await client.connect()
                 self._clients[account_id] = client
+                self._credentials[account_id] = (api_id, api_hash)
+                self._evicted.pop(account_id, None)
+                self._touch(account_id)
                 return client
-            except errors.rpcerrorlist.ApiIdInvalidError:
-                raise InvalidApiCredentials("invalid api_id/api_hash")
-            except errors.FloodWaitError as e:
-                raise FloodWait(int(getattr(e, "seconds", 0)))
-            except Exception as e:
-                self._logger.debug("create_client error: %s", type(e).__name__)
-                raise TelethonManagerError(str(e))
+            except (errors.RPCError, OSError, ValueError) as e:
+                self._debug("create_client error: %s", type(e).__name__)
+                raise _translate_error(e) from e
 
     async def send_code(self, account_id: int, phone: str) -> None:
         """
@@ -148,17 +765,20 @@ class TelethonManager:
             account_id: ID аккаунта
             phone: Номер телефона в международном формате
         """
-        client = self._clients.get(account_id)
+        client = await self._get_client(account_id)
         if not client:
             raise TelethonManagerError(f"Клиент для аккаунта {account_id} не найден")
 
         try:
-            result = await client.send_code_request(phone)
+            # Не повторяем при сетевых сбоях (код мог уйти, повтор пришлёт новый), только после FloodWait
+            result = await self._with_retry(
+                lambda: client.send_code_request(phone), account_id=account_id, max_retries=0
+            )
             self._phone_code_hashes[account_id] = result.phone_code_hash
-            logger.info(f"Код отправлен для аккаунта {account_id}, phone_code_hash сохранен")
-        except Exception as e:
-            logger.error(f"Ошибка отправки кода для аккаунта {account_id}: {e}")
-            raise TelethonManagerError(f"Не удалось отправить код: {str(e)}")
+            logger.info("Код отправлен для аккаунта %s, phone_code_hash сохранен", account_id)
+        except TelethonManagerError as e:
+            logger.error("Ошибка отправки кода для аккаунта %s: %s", account_id, e)
+            raise
 
     async def sign_in_code(self, account_id: int, phone: str, code: str) -> str:
         """
@@ -177,37 +797,46 @@ class TelethonManager:
             PhoneCodeInvalidError: Неверный код
             ExpiredCodeError: Код истек
         """
-        client = self._clients.get(account_id)
+        hashes = self._phone_code_hashes
+
+        client = await self._get_client(account_id)
         if not client:
             raise TelethonManagerError(f"Клиент для аккаунта {account_id} не найден")
 
-        phone_code_hash = self._phone_code_hashes.get(account_id)
+        phone_code_hash = hashes.get(account_id)
         if not phone_code_hash:
             raise TelethonManagerError(
                 f"phone_code_hash не найден для аккаунта {account_id}. Вызовите send_code сначала")
 
         try:
-            await client.sign_in(phone, code, phone_code_hash=phone_code_hash)
-            session_string = client.session.save()
+            # Вход не повторяем при сетевых сбоях (код мог быть уже принят), только после FloodWait
+            await self._with_retry(
+                lambda: client.sign_in(phone, code, phone_code_hash=phone_code_hash),
+                account_id=account_id, max_retries=0
+            )
+            # Сериализация сессии (base64 ключа авторизации) — вне event loop
+            session_string = await asyncio.to_thread(client.session.save)
 
             # Очищаем phone_code_hash после успешного входа
-            self._phone_code_hashes.pop(account_id, None)
+            hashes.pop(account_id, None)
+            self._authorized.add(account_id)
+            self._drop_caches(account_id)
 
-            logger.info(f"Успешный вход для аккаунта {account_id}")
+            logger.info("Успешный вход для аккаунта %s", account_id)
             return session_string
-        except SessionPasswordNeededError:
-            logger.info(f"Требуется 2FA для аккаунта {account_id}")
-            raise PasswordRequired("2FA password required")
-        except PhoneCodeInvalidError:
-            logger.warning(f"Неверный код для аккаунта {account_id}")
-            raise InvalidCode("Invalid phone code")
-        except PhoneCodeExpiredError:
-            logger.warning(f"Код истек для аккаунта {account_id}")
-            self._phone_code_hashes.pop(account_id, None)
-            raise ExpiredCodeError("Код истек, запросите новый")
-        except Exception as e:
-            logger.error(f"Ошибка входа для аккаунта {account_id}: {e}")
-            raise TelethonManagerError(f"Не удалось войти: {str(e)}")
+        except PasswordRequired:
+            logger.info("Требуется 2FA для аккаунта %s", account_id)
+            raise
+        except InvalidCode:
+            logger.warning("Неверный код для аккаунта %s", account_id)
+            raise
+        except ExpiredCodeError:
+            logger.warning("Код истек для аккаунта %s", account_id)
+            hashes.pop(account_id, None)
+            raise
+        except TelethonManagerError as e:
+            logger.error("Ошибка входа для аккаунта %s: %s", account_id, e)
+            raise
 
     async def get_password_hint(self, account_id: int) -> Optional[str]:
         """
@@ -219,17 +848,17 @@ class TelethonManager:
         Returns:
             Подсказка для пароля или None
         """
-        client = self._clients.get(account_id)
+        client = await self._get_client(account_id)
         if not client:
             raise TelethonManagerError(f"Клиент для аккаунта {account_id} не найден")
 
         try:
-            password_info = await client.get_password()
+            password_info = await self._rpc(client.get_password(), account_id=account_id)
             hint = password_info.hint if password_info else None
-            logger.info(f"Password hint для аккаунта {account_id}: {hint or 'отсутствует'}")
+            logger.info("Password hint для аккаунта %s: %s", account_id, hint or "отсутствует")
             return hint
-        except Exception as e:
-            logger.error(f"Ошибка получения password hint для аккаунта {account_id}: {e}")
+        except TelethonManagerError as e:
+            logger.error("Ошибка получения password hint для аккаунта %s: %s", account_id, e)
             return None
 
     async def sign_in_password(self, account_id: int, password: str) -> str:
@@ -247,68 +876,85 @@ class TelethonManager:
             InvalidPasswordError: Неверный пароль
             NotConnected: Клиент не в состоянии для 2FA (нужно сначала ввести код)
         """
-        client = self._clients.get(account_id)
+        client = await self._get_client(account_id)
         if not client:
             raise NotConnected(f"Клиент для аккаунта {account_id} не найден")
 
         try:
-            await client.sign_in(password=password)
-            session_string = client.session.save()
+            await self._with_retry(
+                lambda: client.sign_in(password=password), account_id=account_id, max_retries=0
+            )
+            # Сериализация сессии (base64 ключа авторизации) — вне event loop
+            session_string = await asyncio.to_thread(client.session.save)
 
             # Очищаем phone_code_hash после успешного входа
             self._phone_code_hashes.pop(account_id, None)
+            self._authorized.add(account_id)
+            self._drop_caches(account_id)
 
-            logger.info(f"Успешный вход с 2FA для аккаунта {account_id}")
+            logger.info("Успешный вход с 2FA для аккаунта %s", account_id)
             return session_string
-        except PasswordHashInvalidError:
-            logger.warning(f"Неверный пароль для аккаунта {account_id}")
-            raise InvalidPasswordError("Неверный пароль")
-        except errors.FloodWaitError as e:
-            raise FloodWait(int(getattr(e, "seconds", 0)))
-        except Exception as e:
-            error_msg = str(e)
-            if "key is not registered" in error_msg.lower():
-                logger.warning(f"Неверное состояние для 2FA аккаунта {account_id}: {error_msg}")
-                raise NotConnected("Требуется сначала ввести код подтверждения")
-            logger.error(f"Ошибка входа с 2FA для аккаунта {account_id}: {e}")
-            raise TelethonManagerError(f"Не удалось войти с паролем: {error_msg}")
+        except InvalidPasswordError:
+            logger.warning("Неверный пароль для аккаунта %s", account_id)
+            raise
+        except NotConnected as e:
+            # AuthKeyUnregistered: код подтверждения ещё не введён
+            logger.warning("Неверное состояние для 2FA аккаунта %s: %s", account_id, e)
+            raise NotConnected("Требуется сначала ввести код подтверждения") from e
+        except TelethonManagerError as e:
+            logger.error("Ошибка входа с 2FA для аккаунта %s: %s", account_id, e)
+            raise
 
     async def disconnect(self, account_id: int) -> None:
         """
         Отключает клиента, не делая logout (не удаляет сессию в Telegram).
         """
-        lock = self._get_lock(account_id)
-        async with lock:
+        async with self._account_lock(account_id):
             client = self._clients.pop(account_id, None)
+            self._last_used.pop(account_id, None)
+            self._credentials.pop(account_id, None)
+            # Старый клиент менял объект сессии: переподключение разберёт строку из БД заново
+            self._sessions.pop(account_id, None)
+            self._authorized.discard(account_id)
+            self._drop_caches(account_id)
+            self._drop_limits(account_id)
             if not client:
+                if self._evicted.pop(account_id, None) is not None:
+                    # Клиент уже отключен по простою
+                    return
                 raise NotConnected("no client to disconnect")
             try:
                 await client.disconnect()
-            except Exception as e:
-                self._logger.debug("disconnect error: %s", type(e).__name__)
-                raise TelethonManagerError(str(e))
+            except OSError as e:
+                self._debug("disconnect error: %s", type(e).__name__)
+                raise _translate_error(e) from e
 
     async def logout(self, account_id: int) -> None:
         """
         Выполняет logout в Telegram (удаляет сессию на сервере) и отключает.
         """
-        lock = self._get_lock(account_id)
-        async with lock:
+        async with self._account_lock(account_id):
             client = self._clients.pop(account_id, None)
+            self._last_used.pop(account_id, None)
+            self._credentials.pop(account_id, None)
+            self._evicted.pop(account_id, None)
+            self._sessions.pop(account_id, None)
+            self._authorized.discard(account_id)
+            self._drop_caches(account_id)
+            self._drop_limits(account_id)
             if not client:
                 raise NotConnected("no client to logout")
             try:
                 await client.log_out()
                 await client.disconnect()
-            except errors.FloodWaitError as e:
-                raise FloodWait(int(getattr(e, "seconds", 0)))
-            except Exception as e:
-                self._logger.debug("logout error: %s", type(e).__name__)
-                raise TelethonManagerError(str(e))
+            except (errors.RPCError, OSError) as e:
+                self._debug("logout error: %s", type(e).__name__)
+                raise _translate_error(e) from e
             finally:
                 self._phone_code_hashes.pop(account_id, None)
 
-    def _parse_draft_message(self, draft) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _parse_draft_message(draft) -> Optional[Dict[str, Any]]:
         """Парсит черновик сообщения"""
         if not draft:
             return None
@@ -322,12 +968,13 @@ class TelethonManager:
 
         return {
             "message": getattr(draft, "message", "") or "",
-            "date": draft.date.isoformat() if hasattr(draft, "date") and draft.date else None,
+            "date": getattr(draft, "date", None),
             "replyToMsgId": reply_to_msg_id,
             "noWebpage": getattr(draft, "no_webpage", False)
         }
 
-    def _parse_notify_settings(self, notify_settings) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _parse_notify_settings(notify_settings) -> Optional[Dict[str, Any]]:
         """Парсит настройки уведомлений"""
         if not notify_settings:
             return None
@@ -345,7 +992,8 @@ class TelethonManager:
             "sound": getattr(notify_settings, "sound", None)
         }
 
-    def _is_muted(self, notify_settings) -> bool:
+    @staticmethod
+    def _is_muted(notify_settings) -> bool:
         """
         Определяет заглушен ли диалог.
 
@@ -397,38 +1045,18 @@ class TelethonManager:
 
         return False
 
-    def _parse_user_status(self, status) -> Dict[str, Any]:
+    @staticmethod
+    def _parse_user_status(status) -> Dict[str, Any]:
         """Парсит статус пользователя в унифицированный формат"""
-        if isinstance(status, UserStatusOnline):
-            return {
-                "type": "online",
-                "wasOnline": None
-            }
-        elif isinstance(status, UserStatusOffline):
+        static = _STATIC_STATUS.get(type(status))
+        if static is not None:
+            return static
+        if type(status) is UserStatusOffline:
             return {
                 "type": "offline",
                 "wasOnline": status.was_online.isoformat() if status.was_online else None
             }
-        elif isinstance(status, UserStatusRecently):
-            return {
-                "type": "recently",
-                "wasOnline": None
-            }
-        elif isinstance(status, UserStatusLastWeek):
-            return {
-                "type": "lastWeek",
-                "wasOnline": None
-            }
-        elif isinstance(status, UserStatusLastMonth):
-            return {
-                "type": "lastMonth",
-                "wasOnline": None
-            }
-        else:
-            return {
-                "type": "offline",
-                "wasOnline": None
-            }
+        return _OFFLINE_STATUS
 
     def _parse_photo(self, photo) -> Optional[Dict[str, Any]]:
         """Парсит фото профиля в унифицированный формат"""
@@ -436,14 +1064,26 @@ class TelethonManager:
             return None
 
         if isinstance(photo, (UserProfilePhoto, ChatPhoto)):
-            return {
+            has_video = getattr(photo, "has_video", False)
+            key = (photo.photo_id, photo.dc_id, has_video)
+            cache = self._photo_cache
+            parsed = cache.get(key)
+            if parsed is not None:
+                cache.move_to_end(key)
+                return parsed
+            parsed = {
                 "photoId": str(photo.photo_id),
                 "dcId": photo.dc_id,
-                "hasVideo": getattr(photo, "has_video", False)
+                "hasVideo": has_video
             }
+            cache[key] = parsed
+            if len(cache) > _PHOTO_CACHE_SIZE:
+                cache.popitem(last=False)
+            return parsed
         return None
 
-    def _parse_restriction_reasons(self, reasons) -> Optional[List[Dict[str, str]]]:
+    @staticmethod
+    def _parse_restriction_reasons(reasons) -> Optional[List[Dict[str, str]]]:
         """Парсит причины ограничений"""
         if not reasons:
             return None
@@ -457,17 +1097,23 @@ class TelethonManager:
             })
         return result if result else None
 
-    def _parse_emoji_status(self, emoji_status) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _parse_emoji_status(emoji_status) -> Optional[Dict[str, Any]]:
         """Парсит emoji статус"""
         if not emoji_status:
             return None
 
+        document_id = getattr(emoji_status, "document_id", None)
+        if document_id is None:  # EmojiStatusEmpty
+            return None
+        until = getattr(emoji_status, "until", None)
         return {
-            "documentId": str(getattr(emoji_status, "document_id", "")),
-            "until": getattr(emoji_status, "until", None)
+            "documentId": document_id,
+            "until": int(until.timestamp()) if until is not None else None
         }
 
-    def _parse_usernames(self, usernames) -> Optional[List[Dict[str, Any]]]:
+    @staticmethod
+    def _parse_usernames(usernames) -> Optional[List[Dict[str, Any]]]:
         """Парсит множественные юзернеймы"""
         if not usernames:
             return None
@@ -481,17 +1127,20 @@ class TelethonManager:
             })
         return result if result else None
 
-    def _parse_peer_color(self, color) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _parse_peer_color(color) -> Optional[Dict[str, Any]]:
         """Парсит цвет профиля"""
         if not color:
             return None
 
+        background_emoji_id = getattr(color, "background_emoji_id", None)
         return {
             "color": getattr(color, "color", None),
-            "backgroundEmojiId": str(getattr(color, "background_emoji_id", "")) if getattr(color, "background_emoji_id", None) else None
+            "backgroundEmojiId": background_emoji_id or None
         }
 
-    def _parse_entity_type(self, entity) -> str:
+    @staticmethod
+    def _parse_entity_type(entity) -> str:
         """
         Определяет тип entity.
 
@@ -502,23 +1151,17 @@ class TelethonManager:
         - supergroup: супергруппа (Channel с broadcast=False)
         - channel: канал (Channel с broadcast=True)
         """
-        if isinstance(entity, User):
-            return "bot" if getattr(entity, "bot", False) else "user"
-        elif isinstance(entity, Chat):
-            return "group"
-        elif isinstance(entity, Channel):
-            # broadcast=True означает канал (односторонняя рассылка)
-            if getattr(entity, "broadcast", False):
-                return "channel"
-            # broadcast=False означает супергруппу (многопользовательский чат)
-            return "supergroup"
-        return "unknown"
-
-    def _get_entity_id(self, entity) -> Optional[int]:
+        spec = _ENTITY_TYPE_NAMES.get(type(entity))
+        if spec is None:
+            return "unknown"
+        flag, if_set, if_unset = spec
+        return if_set if flag and getattr(entity, flag, False) else if_unset
+
+    @staticmethod
+    def _get_entity_id(entity) -> Optional[int]:
         """Безопасно получает ID entity"""
-        if isinstance(entity, (User, Chat, Channel)):
-            return entity.id
-        return None
+        get_id = _ID_EXTRACTORS.get(type(entity))
+        return get_id(entity) if get_id is not None else None
 
     async def get_me(self, account_id: int) -> Dict[str, Any]:
         """
@@ -527,93 +1170,56 @@ class TelethonManager:
         Returns:
             Словарь со всеми доступными полями пользователя
         """
-        lock = self._get_lock(account_id)
-        async with lock:
-            client = self._clients.get(account_id)
-            if not client:
-                raise NotConnected("client not created")
+        cached = self._me_cache.get(account_id)
+        if cached and time.monotonic() - cached[0] < self._profile_ttl:
+            me = cached[1]
+        else:
+            async with self.borrow(account_id, "get_me") as client:
+                # get_me уже возвращает полный User (включая lang_code)
+                me = await self._get_me_cached(account_id, client)
 
-            try:
-                if not await client.is_user_authorized():
-                    raise NotConnected("client not authorized")
-
-                # Получаем базовую информацию
-                me = await client.get_me()
-
-                # Получаем полную информацию пользователя (включая lang_code)
-                full_user = await client.get_entity("me")
-
-                # Базовые поля
-                result = {
-                    "id": me.id,
-
-                    # Имена и идентификаторы
-                    "firstName": me.first_name or "",
-                    "lastName": me.last_name or "",
-                    "username": me.username,
-                    "phone": me.phone,
-                    "langCode": getattr(full_user, "lang_code", None) or getattr(me, "lang_code", None),
-
-                    # Флаги статуса
-                    "isSelf": getattr(me, "is_self", True),
-                    "isContact": getattr(me, "contact", False),
-                    "isMutualContact": getattr(me, "mutual_contact", False),
-                    "isDeleted": getattr(me, "deleted", False),
-                    "isBot": me.bot,
-                    "isBotChatHistory": getattr(me, "bot_chat_history", False),
-                    "isBotNochats": getattr(me, "bot_nochats", False),
-                    "isVerified": me.verified,
-                    "isRestricted": getattr(me, "restricted", False),
-                    "isMin": getattr(me, "min", False),
-                    "isBotInlineGeo": getattr(me, "bot_inline_geo", False),
-                    "isSupport": getattr(me, "support", False),
-                    "isScam": getattr(me, "scam", False),
-                    "isFake": getattr(me, "fake", False),
-                    "isPremium": getattr(me, "premium", False),
-                    "isBotAttachMenu": getattr(me, "bot_attach_menu", False),
-                    "isAttachMenuEnabled": getattr(me, "attach_menu_enabled", False),
-                    "isBotCanEdit": getattr(me, "bot_can_edit", False),
-                    "isCloseFriend": getattr(me, "close_friend", False),
-                    "isStoriesHidden": getattr(me, "stories_hidden", False),
-                    "isStoriesUnavailable": getattr(me, "stories_unavailable", False),
-                    "isContactRequirePremium": getattr(me, "contact_require_premium", False),
-                    "isBotBusiness": getattr(me, "bot_business", False),
-                    "isBotHasMainApp": getattr(me, "bot_has_main_app", False),
-                    "isApplyMinPhoto": getattr(me, "apply_min_photo", False),
-
-                    # Медиа
-                    "photo": self._parse_photo(me.photo),
-                    "status": self._parse_user_status(me.status),
-
-                    # Боты
-                    "botInfoVersion": getattr(me, "bot_info_version", None),
-                    "botInlinePlaceholder": getattr(me, "bot_inline_placeholder", None),
-                    "botActiveUsers": getattr(me, "bot_active_users", None),
-
-                    # Ограничения
-                    "restrictionReason": self._parse_restriction_reasons(getattr(me, "restriction_reason", None)),
-
-                    # Emoji статус
-                    "emojiStatus": self._parse_emoji_status(getattr(me, "emoji_status", None)),
-
-                    # Множественные юзернеймы
-                    "usernames": self._parse_usernames(getattr(me, "usernames", None)),
-
-                    # Stories
-                    "storiesMaxId": getattr(me, "stories_max_id", None),
-
-                    # Цвета профиля
-                    "color": self._parse_peer_color(getattr(me, "color", None)),
-                    "profileColor": self._parse_peer_color(getattr(me, "profile_color", None)),
-                }
+        # Базовые поля
+        result = {
+            "id": me.id,
 
-                return result
+            # Имена и идентификаторы
+            "firstName": me.first_name or "",
+            "lastName": me.last_name or "",
+            "username": me.username,
+            "phone": me.phone,
+            "langCode": getattr(me, "lang_code", None),
 
-            except errors.FloodWaitError as e:
-                raise FloodWait(int(getattr(e, "seconds", 0)))
-            except Exception as e:
-                self._logger.error(f"get_me error: {type(e).__name__}: {e}")
-                raise TelethonManagerError(str(e))
+            # Флаги статуса
+            "isSelf": getattr(me, "is_self", True),
+            **{key: getattr(me, attr, default) for key, attr, default in _ME_FLAG_FIELDS},
+
+            # Медиа
+            "photo": self._parse_photo(me.photo),
+            "status": self._parse_user_status(me.status),
+
+            # Боты
+            "botInfoVersion": getattr(me, "bot_info_version", None),
+            "botInlinePlaceholder": getattr(me, "bot_inline_placeholder", None),
+            "botActiveUsers": getattr(me, "bot_active_users", None),
+
+            # Ограничения
+            "restrictionReason": self._parse_restriction_reasons(getattr(me, "restriction_reason", None)),
+
+            # Emoji статус
+            "emojiStatus": self._parse_emoji_status(getattr(me, "emoji_status", None)),
+
+            # Множественные юзернеймы
+            "usernames": self._parse_usernames(getattr(me, "usernames", None)),
+
+            # Stories
+            "storiesMaxId": getattr(me, "stories_max_id", None),
+
+            # Цвета профиля
+            "color": self._parse_peer_color(getattr(me, "color", None)),
+            "profileColor": self._parse_peer_color(getattr(me, "profile_color", None)),
+        }
+
+        return result
 
     async def get_dialogs_extended(
             self,
@@ -635,160 +1241,111 @@ class TelethonManager:
                 - True - только архивные диалоги (folder_id=1)
 
         Returns:
-            Словарь с диалогами и метаданными
+            Словарь с диалогами и метаданными; даты — объекты datetime
+            (в JSON их переводит роутер)
         """
-        lock = self._get_lock(account_id)
-        async with lock:
-            client = self._clients.get(account_id)
-            if not client:
-                raise NotConnected("client not created")
-
-            try:
-                if not await client.is_user_authorized():
-                    raise NotConnected("client not authorized")
-
-                # archived=None вернёт ВСЕ диалоги (обычные + архивные)
-                dialogs = await client.get_dialogs(
-                    limit=limit,
-                    archived=archived  # None/False/True
-                )
-
-                result_dialogs = []
-                for dialog in dialogs:
-                    entity = dialog.entity
-
-                    # ИСПРАВЛЕНО: notify_settings находится в dialog.dialog (сырой TL-объект)
-                    # dialog - это обертка Telethon, dialog.dialog - это сырой TL Dialog
-                    raw_dialog = getattr(dialog, "dialog", None)
-                    notify_settings = getattr(raw_dialog, "notify_settings", None) if raw_dialog else None
-
-                    # Логируем для отладки (можно потом убрать)
+        async with self.borrow(account_id, "get_dialogs_extended") as client:
+            # archived=None вернёт ВСЕ диалоги (обычные + архивные)
+            dialogs = await self._with_retry(lambda: client.get_dialogs(
+                limit=limit,
+                archived=archived  # None/False/True
+            ), account_id=account_id)
+
+            result_dialogs = []
+            # Уровень проверяется один раз, а не на каждый диалог
+            debug = self._debug if self._logger.isEnabledFor(logging.DEBUG) else None
+            entity_parsers = _ENTITY_PARSERS
+            from_id_attrs = _FROM_ID_ATTR
+            parse_photo = self._parse_photo
+            parse_status = self._parse_user_status
+            for dialog in dialogs:
+                entity = dialog.entity
+
+                # ИСПРАВЛЕНО: notify_settings находится в dialog.dialog (сырой TL-объект)
+                # dialog - это обертка Telethon, dialog.dialog - это сырой TL Dialog
+                raw_dialog = getattr(dialog, "dialog", None)
+                notify_settings = getattr(raw_dialog, "notify_settings", None) if raw_dialog else None
+
+                # Логируем для отладки (можно потом убрать)
+                if debug is not None:
                     if notify_settings:
-                        self._logger.debug(
-                            f"Dialog {dialog.name}: notify_settings found - "
-                            f"silent={getattr(notify_settings, 'silent', None)}, "
-                            f"mute_until={getattr(notify_settings, 'mute_until', None)}"
+                        debug(
+                            "Dialog %s: notify_settings found - silent=%s, mute_until=%s",
+                            dialog.name,
+                            getattr(notify_settings, "silent", None),
+                            getattr(notify_settings, "mute_until", None)
                         )
                     else:
-                        self._logger.debug(f"Dialog {dialog.name}: notify_settings is None")
-
-                    # Определяем isMuted через новый метод
-                    is_muted = self._is_muted(notify_settings)
-
-                    # Получаем ID entity безопасно
-                    entity_id = self._get_entity_id(entity)
-                    entity_type = self._parse_entity_type(entity)
-
-                    # Получаем черновик из сырого dialog
-                    draft = getattr(raw_dialog, "draft", None)
-
-                    # Базовая информация о диалоге
-                    dialog_data = {
-                        "id": str(entity_id) if entity_id else "0",
-                        "name": getattr(dialog, "name", None) or getattr(dialog, "title", ""),
-                        "date": dialog.date.isoformat() if getattr(dialog, "date", None) else None,
-                        "unreadCount": getattr(dialog, "unread_count", 0),
-                        "unreadMentionsCount": getattr(dialog, "unread_mentions_count", 0),
-                        "unreadReactionsCount": getattr(dialog, "unread_reactions_count", 0),
-                        "isArchived": getattr(dialog, "archived", False),
-                        "isPinned": getattr(dialog, "pinned", False),
-                        "isMuted": is_muted,
-                        "folderId": getattr(dialog, "folder_id", None),
-                        "type": entity_type,
-                        "notifySettings": self._parse_notify_settings(notify_settings),
-                        "draft": self._parse_draft_message(draft),
+                        debug("Dialog %s: notify_settings is None", dialog.name)
+
+                # Определяем isMuted через новый метод
+                is_muted = self._is_muted(notify_settings)
+
+                # Получаем ID entity безопасно
+                entity_id = self._get_entity_id(entity)
+                entity_type = self._parse_entity_type(entity)
+
+                # Получаем черновик из сырого dialog
+                draft = getattr(raw_dialog, "draft", None)
+
+                # Базовая информация о диалоге
+                dialog_data = {
+                    "id": str(entity_id) if entity_id else "0",
+                    "name": getattr(dialog, "name", None) or getattr(dialog, "title", ""),
+                    "date": getattr(dialog, "date", None),
+                    "unreadCount": getattr(dialog, "unread_count", 0),
+                    "unreadMentionsCount": getattr(dialog, "unread_mentions_count", 0),
+                    "unreadReactionsCount": getattr(dialog, "unread_reactions_count", 0),
+                    "isArchived": getattr(dialog, "archived", False),
+                    "isPinned": getattr(dialog, "pinned", False),
+                    "isMuted": is_muted,
+                    "unreadMark": bool(getattr(raw_dialog, "unread_mark", False)),
+                    "folderId": getattr(dialog, "folder_id", None),
+                    "type": entity_type,
+                    "notifySettings": self._parse_notify_settings(notify_settings),
+                    "draft": self._parse_draft_message(draft),
+                    # Ключи есть всегда (null, если данных нет): ответ отдаётся
+                    # в обход response_model и должен совпадать со схемой
+                    "entity": None,
+                    "lastMessage": None,
+                }
+
+                # Информация о entity
+                parse_entity = entity_parsers.get(type(entity))
+                if parse_entity is not None:
+                    dialog_data["entity"] = parse_entity(entity, parse_photo, parse_status)
+
+                # Последнее сообщение - ИСПРАВЛЕНО (message -> lastMessage)
+                msg = getattr(dialog, "message", None)
+                if msg:
+                    from_id = getattr(msg, "from_id", None)
+                    from_attr = from_id_attrs.get(type(from_id))
+                    from_user_id = getattr(from_id, from_attr) if from_attr else None
+
+                    # Гарантируем, что text всегда строка (может быть None для медиа)
+                    msg_text = getattr(msg, "message", None) or ""
+
+                    dialog_data["lastMessage"] = {
+                        "id": msg.id,
+                        "text": msg_text,
+                        "date": msg.date,
+                        "fromId": from_user_id,
+                        "out": getattr(msg, "out", False),
+                        "mentioned": getattr(msg, "mentioned", False),
+                        "mediaUnread": getattr(msg, "media_unread", False),
+                        "silent": getattr(msg, "silent", False)
                     }
 
-                    # Информация о entity
-                    if isinstance(entity, User):
-                        dialog_data["entity"] = {
-                            "id": entity.id,
-                            "firstName": entity.first_name or "",
-                            "lastName": entity.last_name or "",
-                            "username": entity.username,
-                            "phone": entity.phone,
-                            "isBot": getattr(entity, "bot", False),
-                            "isVerified": getattr(entity, "verified", False),
-                            "isPremium": getattr(entity, "premium", False),
-                            "isContact": getattr(entity, "contact", False),
-                            "isMutualContact": getattr(entity, "mutual_contact", False),
-                            "photo": self._parse_photo(entity.photo),
-                            "status": self._parse_user_status(entity.status)
-                        }
-                    elif isinstance(entity, Chat):
-                        # Обычная группа
-                        dialog_data["entity"] = {
-                            "id": entity.id,
-                            "title": entity.title,
-                            "participantsCount": getattr(entity, "participants_count", 0),
-                            "createdDate": entity.date.isoformat() if getattr(entity, "date", None) else None,
-                            "isCreator": getattr(entity, "creator", False),
-                            "isAdmin": getattr(entity, "admin_rights", None) is not None,
-                            "photo": self._parse_photo(getattr(entity, "photo", None))
-                        }
-                    elif isinstance(entity, Channel):
-                        # Канал или мегагруппа
-                        dialog_data["entity"] = {
-                            "id": entity.id,
-                            "title": entity.title,
-                            "username": getattr(entity, "username", None),
-                            "participantsCount": getattr(entity, "participants_count", 0),
-                            "createdDate": entity.date.isoformat() if getattr(entity, "date", None) else None,
-                            "isCreator": getattr(entity, "creator", False),
-                            "isAdmin": getattr(entity, "admin_rights", None) is not None,
-                            "isBroadcast": getattr(entity, "broadcast", False),  # True = канал, False = мегагруппа
-                            "isVerified": getattr(entity, "verified", False),
-                            "isScam": getattr(entity, "scam", False),
-                            "isFake": getattr(entity, "fake", False),
-                            "hasGeo": getattr(entity, "has_geo", False),
-                            "slowmodeEnabled": getattr(entity, "slowmode_enabled", False),
-                            "photo": self._parse_photo(getattr(entity, "photo", None))
-                        }
-
-                    # Последнее сообщение - ИСПРАВЛЕНО (message -> lastMessage)
-                    msg = getattr(dialog, "message", None)
-                    if msg:
-                        from_id = getattr(msg, "from_id", None)
-                        from_user_id = None
-
-                        if from_id:
-                            if isinstance(from_id, PeerUser):
-                                from_user_id = from_id.user_id
-                            elif isinstance(from_id, PeerChannel):
-                                from_user_id = from_id.channel_id
-                            elif isinstance(from_id, PeerChat):
-                                from_user_id = from_id.chat_id
-
-                        # Гарантируем, что text всегда строка (может быть None для медиа)
-                        msg_text = getattr(msg, "message", None) or ""
-
-                        dialog_data["lastMessage"] = {
-                            "id": msg.id,
-                            "text": msg_text,
-                            "date": msg.date.isoformat() if msg.date else None,
-                            "fromId": from_user_id,
-                            "out": getattr(msg, "out", False),
-                            "mentioned": getattr(msg, "mentioned", False),
-                            "mediaUnread": getattr(msg, "media_unread", False),
-                            "silent": getattr(msg, "silent", False)
-                        }
-
-                    result_dialogs.append(dialog_data)
-
-                # Проверяем есть ли еще диалоги
-                has_more = len(dialogs) == limit
-
-                return {
-                    "total": len(result_dialogs),
-                    "hasMore": has_more,
-                    "dialogs": result_dialogs
-                }
+                result_dialogs.append(dialog_data)
 
-            except errors.FloodWaitError as e:
-                raise FloodWait(int(getattr(e, "seconds", 0)))
-            except Exception as e:
-                self._logger.error(f"get_dialogs_extended error: {type(e).__name__}: {e}")
-                raise TelethonManagerError(str(e))
+            # Проверяем есть ли еще диалоги
+            has_more = len(dialogs) == limit
+
+            return {
+                "total": len(result_dialogs),
+                "hasMore": has_more,
+                "dialogs": result_dialogs
+            }
 
     async def get_folders(self, account_id: int) -> List[Dict[str, Any]]:
         """
@@ -797,222 +1354,299 @@ class TelethonManager:
         Returns:
             Список папок с настройками
         """
-        lock = self._get_lock(account_id)
-        async with lock:
-            client = self._clients.get(account_id)
-            if not client:
-                raise NotConnected("client not created")
+        cached = self._folders_cache.get(account_id)
+        if cached and time.monotonic() - cached[0] < self._profile_ttl:
+            return cached[1]
+
+        async with self.borrow(account_id, "get_folders") as client:
+            # Получаем фильтры диалогов
+            filters_result = await self._with_retry(lambda: client(GetDialogFiltersRequest()), account_id=account_id)
+
+            # Дефолтная папка "Все чаты" — общий шаблон
+            folders = [_DEFAULT_FOLDER]
+
+            # Парсим фильтры из Telegram
+            if hasattr(filters_result, 'filters'):
+                for filter_obj in filters_result.filters:
+                    if isinstance(filter_obj, DialogFilter):
+                        # Извлекаем title - ИСПРАВЛЕНО для Telethon 1.42.0
+                        title = filter_obj.title
+                        if hasattr(title, 'text'):
+                            # title это TextWithEntities объект
+                            title = title.text
+                        elif not isinstance(title, str):
+                            # На всякий случай конвертируем в строку
+                            title = str(title)
+
+                        # Собираем ID чатов
+                        pinned, included, excluded = _FILTER_PEERS(filter_obj)
+                        (contacts, non_contacts, groups, broadcasts, bots,
+                         exclude_muted, exclude_read, exclude_archived) = _FILTER_FLAGS(filter_obj)
+
+                        folders.append({
+                            "id": filter_obj.id,
+                            "title": title,  # Используем извлеченную строку
+                            "isDefault": False,
+                            "emoji": filter_obj.emoticon,
+                            "pinnedDialogIds": list(map(_peer_id, pinned)),
+                            "includedChatIds": list(map(_peer_id, included)),
+                            "excludedChatIds": list(map(_peer_id, excluded)),
+                            "contacts": bool(contacts),
+                            "nonContacts": bool(non_contacts),
+                            "groups": bool(groups),
+                            "broadcasts": bool(broadcasts),
+                            "bots": bool(bots),
+                            "excludeMuted": bool(exclude_muted),
+                            "excludeRead": bool(exclude_read),
+                            "excludeArchived": bool(exclude_archived)
+                        })
+
+            if self._profile_ttl > 0:
+                self._folders_cache[account_id] = (time.monotonic(), folders)
+            return folders
+
+    async def get_dialogs_and_folders(
+            self, account_id: int, limit: int = 100, with_me: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Диалоги (как get_dialogs_extended) и папки одним вызовом: запросы
+        к Telegram выполняются параллельно.
 
-            try:
-                if not await client.is_user_authorized():
-                    raise NotConnected("client not authorized")
-
-                # Получаем фильтры диалогов
-                filters_result = await client(GetDialogFiltersRequest())
-
-                folders = []
-
-                # Добавляем дефолтную папку "Все чаты"
-                folders.append({
-                    "id": 0,
-                    "title": "Все чаты",
-                    "isDefault": True,
-                    "emoji": None,
-                    "pinnedDialogIds": [],
-                    "includedChatIds": [],
-                    "excludedChatIds": [],
-                    "contacts": False,
-                    "nonContacts": False,
-                    "groups": False,
-                    "broadcasts": False,
-                    "bots": False,
-                    "excludeMuted": False,
-                    "excludeRead": False,
-                    "excludeArchived": False
-                })
-
-                # Парсим фильтры из Telegram
-                if hasattr(filters_result, 'filters'):
-                    for filter_obj in filters_result.filters:
-                        if isinstance(filter_obj, DialogFilter):
-                            # Извлекаем title - ИСПРАВЛЕНО для Telethon 1.42.0
-                            title = filter_obj.title
-                            if hasattr(title, 'text'):
-                                # title это TextWithEntities объект
-                                title = title.text
-                            elif not isinstance(title, str):
-                                # На всякий случай конвертируем в строку
-                                title = str(title)
-
-                            # Собираем ID чатов
-                            pinned_ids = [str(peer.user_id if hasattr(peer, 'user_id')
-                                             else peer.channel_id if hasattr(peer, 'channel_id')
-                                             else peer.chat_id)
-                                         for peer in getattr(filter_obj, 'pinned_peers', [])]
-
-                            included_ids = [str(peer.user_id if hasattr(peer, 'user_id')
-                                              else peer.channel_id if hasattr(peer, 'channel_id')
-                                              else peer.chat_id)
-                                          for peer in getattr(filter_obj, 'include_peers', [])]
-
-                            excluded_ids = [str(peer.user_id if hasattr(peer, 'user_id')
-                                              else peer.channel_id if hasattr(peer, 'channel_id')
-                                              else peer.chat_id)
-                                          for peer in getattr(filter_obj, 'exclude_peers', [])]
-
-                            folders.append({
-                                "id": filter_obj.id,
-                                "title": title,  # Используем извлеченную строку
-                                "isDefault": False,
-                                "emoji": getattr(filter_obj, "emoticon", None),
-                                "pinnedDialogIds": pinned_ids,
-                                "includedChatIds": included_ids,
-                                "excludedChatIds": excluded_ids,
-                                "contacts": getattr(filter_obj, "contacts", False),
-                                "nonContacts": getattr(filter_obj, "non_contacts", False),
-                                "groups": getattr(filter_obj, "groups", False),
-                                "broadcasts": getattr(filter_obj, "broadcasts", False),
-                                "bots": getattr(filter_obj, "bots", False),
-                                "excludeMuted": getattr(filter_obj, "exclude_muted", False),
-                                "excludeRead": getattr(filter_obj, "exclude_read", False),
-                                "excludeArchived": getattr(filter_obj, "exclude_archived", False)
-                            })
-
-                return folders
-
-            except errors.FloodWaitError as e:
-                raise FloodWait(int(getattr(e, "seconds", 0)))
-            except Exception as e:
-                self._logger.error(f"get_folders error: {type(e).__name__}: {e}")
-                raise TelethonManagerError(str(e))
-
-    async def get_dialogs(self, account_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+        Args:
+            account_id: ID аккаунта
+            limit: Количество диалогов
+            with_me: Добавить профиль (как get_me) — данные для первого экрана
+
+        Returns:
+            {"dialogs": {...}, "folders": [...]}, при with_me ещё "me": {...}
+        """
+        client = await self._get_client(account_id)
+        if not client:
+            raise NotConnected("client not created")
+        # Проверяем авторизацию заранее, чтобы все запросы взяли её из кеша
+        await self._ensure_authorized(account_id, client)
+
+        # Ошибка любого запроса отменяет остальные
+        try:
+            async with asyncio.TaskGroup() as tg:
+                dialogs = tg.create_task(self.get_dialogs_extended(account_id, limit=limit))
+                folders = tg.create_task(self.get_folders(account_id))
+                me = tg.create_task(self.get_me(account_id)) if with_me else None
+        except ExceptionGroup as eg:
+            # Вызывающий ожидает исключения менеджера (NotConnected, FloodWait...), а не группу
+            raise eg.exceptions[0]
+
+        result = {"dialogs": dialogs.result(), "folders": folders.result()}
+        if me is not None:
+            result["me"] = me.result()
+        return result
+
+    async def _fetch_dialog_rows(
+            self, account_id: int, client: TelegramClient, limit: int
+    ) -> List[DialogRow]:
+        """
+        Краткий список диалогов напрямую через GetDialogsRequest, страницами
+        до _DIALOGS_CHUNK строк.
+
+        В отличие от client.get_dialogs() не создаёт Dialog/Message-обёртки
+        Telethon для каждого диалога: из ответа берутся только entity и счётчик
+        непрочитанных, сообщения нужны лишь для смещения следующей страницы.
+        """
+        row_builders = _ROW_BUILDERS
+        rows: List[DialogRow] = []
+        append = rows.append
+        seen: Set[int] = set()
+        offset_date, offset_id, offset_peer = None, 0, _EMPTY_PEER
+        exclude_pinned = False
+
+        while len(rows) < limit:
+            request = GetDialogsRequest(
+                offset_date=offset_date,
+                offset_id=offset_id,
+                offset_peer=offset_peer,
+                limit=min(limit - len(rows), _DIALOGS_CHUNK),
+                hash=0,
+                exclude_pinned=exclude_pinned,
+            )
+            r = await self._with_retry(lambda: client(request), account_id=account_id)
+
+            entities = {
+                get_peer_id(x): x for x in itertools.chain(r.users, r.chats)
+                if not isinstance(x, (UserEmpty, ChatEmpty))
+            }
+            last_entity = None
+            for d in r.dialogs:
+                peer = getattr(d, "peer", None)  # у DialogFolder peer нет
+                if peer is None:
+                    continue
+                peer_id = get_peer_id(peer)
+                ent = entities.get(peer_id)
+                if ent is None or peer_id in seen:
+                    continue
+                seen.add(peer_id)
+                last_entity = ent
+                append(row_builders.get(type(ent), _generic_row)(ent, d.unread_count))
+
+            if last_entity is None or len(r.dialogs) < request.limit or not isinstance(r, DialogsSlice):
+                break
+
+            # Смещение — последний диалог с сообщением (закреплённые нарушают порядок)
+            messages = {
+                (get_peer_id(m.peer_id), m.id): m for m in r.messages if getattr(m, "peer_id", None)
+            }
+            last_message = next(filter(None, (
+                messages.get((get_peer_id(d.peer), d.top_message))
+                for d in reversed(r.dialogs) if getattr(d, "peer", None)
+            )), None)
+            exclude_pinned = True
+            offset_id = last_message.id if last_message else 0
+            offset_date = last_message.date if last_message else None
+            offset_peer = get_input_peer(last_entity)
+
+        return rows[:limit]
+
+    async def get_dialogs(self, account_id: int, limit: int = 50) -> List[DialogRow]:
         """
         Возвращает упрощённый список диалогов для front-end:
-        [{'id': id, 'title': '...', 'username': '...', 'unread_count': N}, ...]
+        [DialogRow(id, title, username, unread_count), ...]
         """
-        lock = self._get_lock(account_id)
-        async with lock:
-            client = self._clients.get(account_id)
-            if not client:
-                raise NotConnected("client not created")
-            try:
-                if not await client.is_user_authorized():
-                    raise NotConnected("client not authorized")
-
-                dialogs = await client.get_dialogs(limit=limit)
-                result = []
-
-                for d in dialogs:
-                    ent = getattr(d, "entity", None)
-                    if not ent:
-                        continue
-
-                    uid = self._get_entity_id(ent)
-                    title = getattr(d, "title", None) or getattr(ent, "title", None) or getattr(ent, "first_name", None)
-                    username = getattr(ent, "username", None)
-                    unread = getattr(d, "unread_count", 0)
-
-                    result.append({
-                        "id": uid,
-                        "title": title,
-                        "username": username,
-                        "unread_count": unread
-                    })
-
-                return result
-            except errors.FloodWaitError as e:
-                raise FloodWait(int(getattr(e, "seconds", 0)))
-            except Exception as e:
-                self._logger.debug("get_dialogs error: %s", type(e).__name__)
-                raise TelethonManagerError(str(e))
+        limit = max(1, min(limit, _DIALOGS_MAX))
+        cached = self._dialog_cache.get(account_id)
+        if cached and time.monotonic() - cached[0] < self._dialog_ttl:
+            _, cached_limit, rows = cached
+            # Запись подходит, если загружено не меньше строк или список диалогов короче
+            if limit <= cached_limit or len(rows) < cached_limit:
+                return list(rows[:limit])
+
+        async with self.borrow(account_id, "get_dialogs") as client:
+            result = await self._fetch_dialog_rows(account_id, client, limit)
+
+            if self._dialog_ttl > 0:
+                now = time.monotonic()
+                # Заодно убираем устаревшие записи (аккаунты, к которым больше не обращались)
+                stale = [k for k, v in self._dialog_cache.items() if now - v[0] >= self._dialog_ttl]
+                for k in stale:
+                    del self._dialog_cache[k]
+                self._dialog_cache[account_id] = (now, limit, tuple(result))
+            return result
 
     async def get_common_data(self, account_id: int) -> Dict[str, Any]:
         """
         Получить общие данные о клиенте (авторизован ли и т.д.)
         """
-        lock = self._get_lock(account_id)
-        async with lock:
-            client = self._clients.get(account_id)
-            if not client:
-                return {"authorized": False}
+        client = await self._get_client(account_id)
+        if not client:
+            return {"authorized": False}
+        try:
+            authorized = await self._is_authorized(account_id, client)
+            return {"authorized": authorized}
+        except NotConnected:
+            self._authorized.discard(account_id)
+            return {"authorized": False}
+        except TelethonManagerError:
+            return {"authorized": False}
+
+    async def _disconnect_one(self, account_id: int, client: TelegramClient, sem: asyncio.Semaphore) -> None:
+        """
+        Отключает один клиент под его lock'ом (используется в disconnect_all).
+        Зависший disconnect прерывается через _DISCONNECT_TIMEOUT секунд.
+        """
+        async with sem, self._account_lock(account_id):
             try:
-                authorized = await client.is_user_authorized()
-                return {"authorized": authorized}
-            except Exception:
-                return {"authorized": False}
+                async with asyncio.timeout(_DISCONNECT_TIMEOUT):
+                    await client.disconnect()
+            finally:
+                # Удаляем клиент из словаря независимо от результата
+                self._clients.pop(account_id, None)
 
     async def disconnect_all(self) -> None:
         """
         Отключает все активные клиенты и очищает внутренний словарь.
         Не логирует чувствительные данные (session_string).
         """
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+
         items = list(self._clients.items())
-        errors = []
-        for account_id, client in items:
-            lock = self._get_lock(account_id)
-            try:
-                async with lock:
-                    try:
-                        # Пытаемся корректно отключить клиент
-                        await client.disconnect()
-                    except Exception as e:
-                        # Не выбрасываем наружу — собираем и логируем
-                        self._logger.debug("disconnect_all: error disconnecting account %s: %s", account_id,
-                                           type(e).__name__)
-                        errors.append((account_id, str(e)))
-                    finally:
-                        # Удаляем клиент из словаря независимо от результата
-                        self._clients.pop(account_id, None)
-            except Exception as e:
-                self._logger.debug("disconnect_all: lock error for account %s: %s", account_id, type(e).__name__)
-                errors.append((account_id, str(e)))
-
-        if errors:
-            self._logger.warning("disconnect_all completed with errors for accounts: %s", [a for a, _ in errors])
-
-    async def download_profile_photo(self, account_id: int, size: str = "big") -> Optional[bytes]:
-        """
-        Скачать фото профиля текущего пользователя.
+        # Отключаем клиенты параллельно, но не более _DISCONNECT_CONCURRENCY сокетов разом
+        sem = asyncio.Semaphore(_DISCONNECT_CONCURRENCY)
+        results = await asyncio.gather(
+            *(self._disconnect_one(account_id, client, sem) for account_id, client in items),
+            return_exceptions=True
+        )
+
+        teardown_errors = []
+        for (account_id, _), result in zip(items, results):
+            if isinstance(result, BaseException):
+                # Не выбрасываем наружу — собираем и логируем
+                self._debug("disconnect_all: error disconnecting account %s: %s", account_id,
+                            type(result).__name__)
+                teardown_errors.append((account_id, str(result)))
+
+        self._last_used.clear()
+        self._credentials.clear()
+        self._evicted.clear()
+        self._sessions.clear()
+        self._dialog_cache.clear()
+        self._me_cache.clear()
+        self._folders_cache.clear()
+        self._account_slots.clear()
+        self._account_buckets.clear()
+        self._authorized.clear()
+
+        if teardown_errors:
+            self._logger.warning("disconnect_all completed with errors for accounts: %s",
+                                 [a for a, _ in teardown_errors])
+
+    async def download_profile_photo_stream(
+            self, account_id: int, size: str = "big"
+    ) -> AsyncIterator[bytes]:
+        """
+        Скачать фото профиля текущего пользователя частями по _PHOTO_CHUNK_SIZE.
+
+        Каждая часть — отдельный запрос upload.GetFile со своим таймаутом
+        и лимитами аккаунта; следующая запрашивается только когда потребитель
+        забрал предыдущую. Если фото не установлено, не отдаёт ничего.
 
         Args:
             account_id: ID аккаунта
             size: Размер фото ("small" для маленького, "big" для большого)
 
-        Returns:
-            bytes: Бинарные данные изображения или None если фото не установлено
-
         Raises:
             NotConnected: Клиент не подключен
             TelethonManagerError: Ошибка при скачивании фото
         """
-        client = self._clients.get(account_id)
-        if not client:
-            raise NotConnected("client not created")
-        try:
-            if not await client.is_user_authorized():
-                raise NotConnected("client not authorized")
-            me = await client.get_me()
+        async with self.borrow(account_id, "download_profile_photo") as client:
+            me = await self._get_me_cached(account_id, client)
 
             # Проверяем наличие фото
-            if not me.photo:
-                return None
-
-            # Определяем размер для скачивания
-            # small = True для маленького размера, False для большого
-            download_big = (size == "big")
-
-            # Скачиваем фото в память
-            photo_bytes = await client.download_profile_photo(
-                me,
-                file=bytes,  # Скачиваем в байты, а не в файл
-                download_big=download_big
+            photo = me.photo
+            if not isinstance(photo, UserProfilePhoto):
+                return
+
+            location = InputPeerPhotoFileLocation(
+                peer=InputPeerSelf(),
+                photo_id=photo.photo_id,
+                big=(size == "big")
             )
-
-            return photo_bytes
-
-        except errors.FloodWaitError as e:
-            raise FloodWait(int(getattr(e, "seconds", 0)))
-        except Exception as e:
-            self._logger.error(f"Error downloading profile photo for account {account_id}: {type(e).__name__} - {e}")
-            raise TelethonManagerError(f"Failed to download profile photo: {str(e)}")
+            # Фото лежит в своём DC: iter_download сам берёт для него отдельное соединение
+            async with client.iter_download(
+                location, dc_id=photo.dc_id, request_size=_PHOTO_CHUNK_SIZE
+            ) as chunks:
+                while True:
+                    try:
+                        async with self._account_slot(account_id), asyncio.timeout(self._rpc_timeout):
+                            chunk = await chunks.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    except TimeoutError:
+                        raise TelethonManagerError("rpc timeout")
+                    except (errors.RPCError, OSError) as e:
+                        raise _translate_error(e) from e
+                    yield chunk
+
+
+# Общий экземпляр на процесс. asyncio-объекты (lock'и, задачи) создаются лениво
+# внутри корутин, поэтому создание при импорте не привязывает его к event loop.
+telethon_manager = TelethonManager()